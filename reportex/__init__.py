@@ -1,5 +1,5 @@
 from reportex.container import Container
-from reportex.text import Text, CtxFont
+from reportex.text import Text, CtxFont, RichText, Span
 from reportex.document import Document, Page
 from reportex.field import LabledField, LabeledFieldAlignment
 
@@ -17,15 +17,25 @@ from reportex.widgets import (
     SizedBox,
     Center,
     Divider,
+    Reusable,
 )
 from reportex.multpage import MultiPage
+from reportex.pagination import PageBreak
+from reportex.flow import Flow
 from reportex.box import Box
+from reportex.incremental import IncrementalRenderer
+from reportex.aggregate import Aggregate, Subtotals
+from reportex.spatial import LayoutIndex
+from reportex.references import Anchor, PageNumber, PageRef
+from reportex.render import RenderTree
 
 
 __all__ = [
     Container,
     Text,
     CtxFont,
+    RichText,
+    Span,
     DeprecationWarning,
     Padding,
     Page,
@@ -48,4 +58,15 @@ __all__ = [
     Cell,
     MultiPageTable,
     MultiPage,
+    PageBreak,
+    Flow,
+    IncrementalRenderer,
+    Reusable,
+    Aggregate,
+    Subtotals,
+    LayoutIndex,
+    Anchor,
+    PageNumber,
+    PageRef,
+    RenderTree,
 ]
@@ -0,0 +1,135 @@
+import operator
+from typing import Any, Callable
+
+from reportex.table import Cell, TableRow
+from reportex.text import Text
+
+
+class Aggregate:
+    """folds the values of one table column, one row at a time.
+
+    `value` picks the row's value, by default `row.data[column]`. rows whose
+    value is None are skipped.
+    """
+
+    def __init__(
+        self,
+        column: int,
+        reducer: Callable[[Any, Any], Any],
+        initial=None,
+        *,
+        value: Callable[[TableRow], Any] = None,
+        format: Callable[[Any], str] = str,
+    ):
+        self.column = column
+        self.reducer = reducer
+        self.initial = initial
+        self.value = value or self._data_value
+        self.format = format
+
+    def _data_value(self, row: TableRow):
+        return row.data[self.column]
+
+    def step(self, acc, row: TableRow):
+        return self.fold(acc, self.value(row))
+
+    def fold(self, acc, value):
+        if value is None:
+            return acc
+        if acc is None:
+            return value
+        return self.reducer(acc, value)
+
+
+def Sum(column: int, *, value=None, format: Callable[[Any], str] = str) -> Aggregate:
+    return Aggregate(column, operator.add, 0, value=value, format=format)
+
+
+def Count(column: int, *, format: Callable[[Any], str] = str) -> Aggregate:
+    return Aggregate(column, operator.add, 0, value=lambda row: 1, format=format)
+
+
+def Min(column: int, *, value=None, format: Callable[[Any], str] = str) -> Aggregate:
+    return Aggregate(column, min, value=value, format=format)
+
+
+def Max(column: int, *, value=None, format: Callable[[Any], str] = str) -> Aggregate:
+    return Aggregate(column, max, value=value, format=format)
+
+
+class Totals:
+    """running values of a list of aggregates"""
+
+    def __init__(self, aggregates: list[Aggregate]):
+        self.aggregates = aggregates
+        self.values = [agg.initial for agg in aggregates]
+
+    def add(self, row: TableRow):
+        self.add_values(self.row_values(row))
+
+    def row_values(self, row: TableRow) -> tuple:
+        """what each aggregate takes from `row`"""
+        return tuple(agg.value(row) for agg in self.aggregates)
+
+    def add_values(self, values: tuple):
+        self.values = [
+            agg.fold(acc, value)
+            for agg, acc, value in zip(self.aggregates, self.values, values)
+        ]
+
+    def formatted(self) -> dict[Aggregate, str]:
+        return {
+            agg: "" if value is None else agg.format(value)
+            for agg, value in zip(self.aggregates, self.values)
+        }
+
+
+class Subtotals:
+    """what a `MultiPageTable` totals up and which total rows it emits.
+
+    every page but the last ends with a `page_total` and a `carried_forward`
+    row and every page but the first starts with a `brought_forward` row, the
+    last page ends with its page total and the `grand_total`. a label set to
+    None leaves its row out. `row` builds a total row from its label and the
+    formatted values by aggregate, by default the values of the aggregates of
+    one column share its cell.
+    """
+
+    def __init__(
+        self,
+        aggregates: list[Aggregate],
+        *,
+        page_total: str | None = "Page total",
+        carried_forward: str | None = "Carried forward",
+        brought_forward: str | None = "Brought forward",
+        grand_total: str | None = "Total",
+        label_column: int = 0,
+        row: Callable[[str, dict[Aggregate, str]], TableRow] = None,
+    ):
+        self.aggregates = aggregates
+        self.page_total = page_total
+        self.carried_forward = carried_forward
+        self.brought_forward = brought_forward
+        self.grand_total = grand_total
+        self.label_column = label_column
+        self.row = row
+
+    def totals(self) -> Totals:
+        return Totals(self.aggregates)
+
+    def make_row(
+        self, label: str, values: dict[Aggregate, str], columns: int
+    ) -> TableRow:
+        if self.row is not None:
+            return self.row(label, values)
+        texts = [[] for _ in range(columns)]
+        for agg, text in values.items():
+            if text and agg.column < columns:
+                texts[agg.column].append(text)
+        texts[self.label_column] = [label]
+        return TableRow(cells=[Cell(child=Text(" / ".join(t))) for t in texts])
+
+    @property
+    def rows_at_page_end(self) -> int:
+        closing = max(self.carried_forward is not None, self.grand_total is not None)
+        return (self.page_total is not None) + closing
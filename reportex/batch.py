@@ -0,0 +1,144 @@
+import csv
+import json
+import math
+import time
+import pathlib
+import importlib.util
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from types import ModuleType
+from typing import Iterable, Iterator
+
+from reportex.document import Document, Page
+from reportex.exceptions import BatchError
+
+
+def load_template(path: pathlib.Path) -> ModuleType:
+    """import a template file. it defines `pages(record) -> list[Page]`"""
+    name = f"reportex_template_{path.stem}"
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if not callable(getattr(module, "pages", None)):
+        raise AttributeError(f"{path} has no pages(record) function")
+    return module
+
+
+def read_records(path: pathlib.Path) -> Iterator[dict]:
+    """stream the records of a .jsonl or .csv file, one at a time"""
+    with open(path, newline="") as f:
+        if path.suffix.lower() == ".csv":
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+# the template of a worker process, loaded once per process
+_template: ModuleType | None = None
+
+
+def _init_worker(template_path: pathlib.Path):
+    global _template
+    _template = load_template(template_path)
+
+
+def _render_one(record: dict, doc_name: str) -> tuple[float, int]:
+    start = time.perf_counter()
+    doc = Document(doc_name=doc_name, pages=_template.pages(record))
+    doc.create()
+    return time.perf_counter() - start, doc.page_count
+
+
+def _doc_name(out_dir: pathlib.Path, record: dict, ind: int, name_field: str | None):
+    name = str(record.get(name_field, ind)) if name_field else str(ind)
+    # a name is a file in out_dir, it can't reach into or out of other folders
+    if name in ("", ".", "..") or "/" in name or "\\" in name:
+        raise BatchError(
+            f"record {ind}: {name_field} {name!r} isn't a file name"
+        )
+    return str(out_dir / f"{name}.pdf")
+
+
+def _jobs(out_dir: pathlib.Path, records: Iterable[dict], name_field: str | None):
+    """each record with its pdf, two records can't write the same one"""
+    names = set()
+    for ind, rec in enumerate(records):
+        name = _doc_name(out_dir, rec, ind, name_field)
+        if name in names:
+            raise BatchError(f"record {ind} is named like an earlier one: {name}")
+        names.add(name)
+        yield rec, name
+
+
+def render_each(
+    template_path: pathlib.Path,
+    records: Iterable[dict],
+    out_dir: pathlib.Path,
+    workers: int = 1,
+    name_field: str | None = None,
+) -> list[tuple[float, int]]:
+    """render a document per record, `(seconds, pages)` for each.
+
+    records are read as the pool takes them, at most a few per worker are
+    held in memory at a time. a `name_field` value given twice, or one with a
+    path separator in it, raises `BatchError` once the records before it are
+    rendered.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    jobs = _jobs(out_dir, records, name_field)
+    if workers <= 1:
+        _init_worker(template_path)
+        return [_render_one(rec, name) for rec, name in jobs]
+
+    results = []
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(template_path,)
+    ) as pool:
+        pending = deque()
+        for rec, name in jobs:
+            pending.append(pool.submit(_render_one, rec, name))
+            if len(pending) >= 2 * workers:
+                results.append(pending.popleft().result())
+        results.extend(future.result() for future in pending)
+    return results
+
+
+def render_merged(
+    template_path: pathlib.Path, records: Iterable[dict], doc_name: str
+) -> tuple[float, int]:
+    """render the pages of every record into the one document, in this
+    process, a document is laid out and drawn by one"""
+    template = load_template(template_path)
+    start = time.perf_counter()
+    pages: list[Page] = []
+    for record in records:
+        pages.extend(template.pages(record))
+    doc = Document(doc_name=doc_name, pages=pages)
+    doc.create()
+    return time.perf_counter() - start, doc.page_count
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """nearest rank percentile of `values`"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summary(results: list[tuple[float, int]], elapsed: float) -> dict[str, float]:
+    latencies = [secs for secs, _ in results]
+    pages = sum(count for _, count in results)
+    return {
+        "documents": len(results),
+        "pages": pages,
+        "seconds": elapsed,
+        "docs/s": len(results) / elapsed if elapsed else 0,
+        "pages/s": pages / elapsed if elapsed else 0,
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p99": percentile(latencies, 99),
+    }
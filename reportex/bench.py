@@ -0,0 +1,195 @@
+import io
+import sys
+import time
+import random
+import resource
+import tempfile
+from typing import Callable
+
+from PIL import Image as imagemod
+from reportlab.pdfgen.canvas import Canvas
+
+from reportex.batch import percentile
+from reportex.column import Column
+from reportex.container import Container
+from reportex.core import Alignment, BoxConstraints, DocInfo, EdgeInset, Position, Widget
+from reportex.document import Document, Page
+from reportex.image import Image
+from reportex.multpage import MultiPage
+from reportex.row import Row
+from reportex.table import Cell, MultiPageTable, TableColumnData, TableRow
+from reportex.text import Text
+from reportex.widgets import Align, Padding
+
+
+def deep_tree(depth: int) -> Widget:
+    """`depth` widgets nested in a chain, cycling Align, Padding and Container
+    like generated templates do"""
+    widget = Text("deep")
+    for level in range(depth):
+        match level % 3:
+            case 0:
+                widget = Align(child=widget, alignment=Alignment.CENTER)
+            case 1:
+                widget = Padding(child=widget, padding=EdgeInset.all(0))
+            case 2:
+                widget = Container(child=widget)
+    return widget
+
+
+def wide_tree(width: int, per_row: int = 1000) -> Widget:
+    """a column of rows holding `width` empty containers in total"""
+    rows = []
+    for start in range(0, width, per_row):
+        count = min(per_row, width - start)
+        rows.append(Row(children=[Container(width=0, height=0) for _ in range(count)]))
+    return Column(children=rows)
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def measure(widget: Widget) -> dict[str, float]:
+    """seconds spent in layout and in draw for a tree of a full page"""
+    constraints = BoxConstraints(0, 0, DocInfo.page.width, DocInfo.page.height)
+    canvas = Canvas(io.BytesIO())
+    # the page stands in as the parent that `Align` measures itself against
+    root = Container(child=widget)
+    root.offset = Position(0, 0)
+    return {
+        "layout": _timed(lambda: root.layout(constraints)),
+        "draw": _timed(lambda: root.draw(canvas, Position(0, DocInfo.page.height))),
+    }
+
+
+def run(depth: int = 10_000, width: int = 1_000_000) -> dict[str, dict[str, float]]:
+    results = {}
+    results[f"deep {depth}"] = measure(deep_tree(depth))
+    results[f"wide {width}"] = measure(wide_tree(width))
+    return results
+
+
+def report(results: dict[str, dict[str, float]]):
+    for name, timings in results.items():
+        cols = "  ".join(f"{phase} {secs:8.3f}s" for phase, secs in timings.items())
+        print(f"{name:>14}  {cols}")
+
+
+_WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua"
+).split()
+
+
+def _words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(count))
+
+
+def text_pages(rng: random.Random) -> list[Page]:
+    """a page of wrapped paragraphs"""
+    paragraphs = [Text(_words(rng, rng.randint(40, 120))) for _ in range(12)]
+    return [Page(child=Column(children=paragraphs))]
+
+
+def table_pages(rng: random.Random) -> list[Page]:
+    """a table running over several pages"""
+    rows = [
+        TableRow(cells=[Cell(child=Text(_words(rng, 2))) for _ in range(5)])
+        for _ in range(200)
+    ]
+    table = MultiPageTable(columns=[TableColumnData() for _ in range(5)], rows=rows)
+    return [Page(child=MultiPage(children=[table]))]
+
+
+_image_file = None
+
+
+def image_pages(rng: random.Random) -> list[Page]:
+    """a grid of small images"""
+    global _image_file
+    if _image_file is None:
+        _image_file = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
+        imagemod.new("RGB", (64, 64), (70, 130, 180)).save(_image_file.name)
+    rows = [
+        Row(
+            children=[
+                Image.from_file(filename=_image_file.name, width=48, height=48)
+                for _ in range(8)
+            ]
+        )
+        for _ in range(10)
+    ]
+    return [Page(child=Column(children=rows))]
+
+
+def nested_pages(rng: random.Random) -> list[Page]:
+    """a deeply nested chain of single child widgets"""
+    return [Page(child=deep_tree(300))]
+
+
+WORKLOADS: dict[str, Callable[[random.Random], list[Page]]] = {
+    "text": text_pages,
+    "tables": table_pages,
+    "images": image_pages,
+    "nested": nested_pages,
+}
+
+
+def run_workload(name: str, iterations: int = 20) -> dict[str, float]:
+    """render the workload's document `iterations` times into memory.
+
+    ops/s counts documents, the page times are layout plus draw of each
+    `Page`, however many pdf pages it ends up on.
+    """
+    build = WORKLOADS[name]
+    rng = random.Random(0)
+    page_times = []
+    total = 0
+    for _ in range(iterations):
+        doc = Document(doc_name=io.BytesIO(), pages=build(rng))
+        canvas = doc.make_canvas()
+        constraints = BoxConstraints(0, 0, *doc.page_size)
+        pos = Position(0, doc.page_size[1])
+        start = time.perf_counter()
+        for page in doc.pages:
+            page_start = time.perf_counter()
+            doc._layout_page(page, constraints)
+            doc._draw_page(canvas, page, pos)
+            page_times.append(time.perf_counter() - page_start)
+        canvas.save()
+        total += time.perf_counter() - start
+    return {
+        "ops/s": iterations / total,
+        "p50 ms": percentile(page_times, 50) * 1000,
+        "p99 ms": percentile(page_times, 99) * 1000,
+        "peak rss MB": peak_rss() / 1024,
+    }
+
+
+def peak_rss() -> float:
+    """peak resident set size of the process so far, in KB"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macos reports bytes, linux kilobytes
+    return rss / 1024 if sys.platform == "darwin" else rss
+
+
+def run_workloads(names=None, iterations: int = 20) -> dict[str, dict[str, float]]:
+    return {name: run_workload(name, iterations) for name in names or WORKLOADS}
+
+
+def report_table(results: dict[str, dict[str, float]]):
+    """print results as a table, a row per workload"""
+    if not results:
+        return
+    columns = list(next(iter(results.values())))
+    print(f"{'workload':>10}" + "".join(f"{col:>14}" for col in columns))
+    for name, values in results.items():
+        print(f"{name:>10}" + "".join(f"{values[col]:>14.2f}" for col in columns))
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:3]]
+    report(run(*sizes))
@@ -3,6 +3,7 @@ from dataclasses import dataclass
 import math
 
 from reportlab.pdfgen.canvas import Canvas
+from reportex.engine import Stepped
 from reportex.core import (
     BoxConstraints,
     Position,
@@ -27,7 +28,16 @@ class Line:
         return math.sqrt((self.x2 - self.x1) ** 2 + (self.y2 - self.y1) ** 2)
 
 
-class Box(SingleChildWidget):
+def _fit(length: float | None, limit: float) -> float | None:
+    """`length` clamped to `limit`, an unset length stays None"""
+    if length is None:
+        return None
+    if length == INFINITY or length > limit:
+        return limit
+    return length
+
+
+class Box(Stepped, SingleChildWidget):
     def __init__(
         self,
         *,
@@ -53,130 +63,83 @@ class Box(SingleChildWidget):
     def client_origin(self):
         return Position(self.border.left.width, self.border.top.width)
 
-    def layout(self, constraints: BoxConstraints) -> Size:
-        if self.width is not None and self.height is not None:
-            size = self._layout_with_size(constraints)
-        elif self.width is not None and self.height is None:
-            size = self._layout_with_width(constraints)
-        elif self.width is None and self.height is not None:
-            size = self._layout_with_height(constraints)
-        else:
-            size = self._layout_with_nosize(constraints)
-
-        self.set_size(size)
-        # breakpoint()
-        if self.child:
-            self.child.offset = Position(
-                (self.client_width - self.child.width) / 2 + self.border.left.width,
-                (self.client_height - self.child.height) / 2 + self.border.top.width,
-            )
-        return size
-
-    def _layout_with_width(self, constraints: BoxConstraints):
+    def intrinsic_widths(self) -> tuple[float, float]:
+        if self.width is not None and self.width != INFINITY:
+            return self.width, self.width
         border_width = self.border.left.width + self.border.right.width
-        border_width_vert = self.border.top.width + self.border.bottom.width
-        width = (
-            constraints.max_width
-            if (self.width == INFINITY or self.width > constraints.max_width)
-            else self.width
-        )
-
-        if not self.child:
-            return Size(self.width, 0)
-
-        child_size = self.child.layout(
-            BoxConstraints(
-                0,
-                0,
-                width - border_width,
-                constraints.max_height - border_width_vert,
-            )
-        )
-        size = Size(width, child_size.height + border_width_vert)
-        return size
+        cmin, cmax = super().intrinsic_widths()
+        return cmin + border_width, cmax + border_width
 
-    def _layout_with_height(self, constraints: BoxConstraints):
-        border_width = self.border.left.width + self.border.right.width
-        border_width_vert = self.border.top.width + self.border.bottom.width
-        height = (
-            constraints.max_height
-            if (self.height == INFINITY or self.height > constraints.max_height)
-            else self.height
-        )
+    def layout_steps(self, constraints: BoxConstraints):
         if not self.child:
-            return Size(0, self.height)
-
-        child_size = self.child.layout(
+            size = self._leaf_size(constraints)
+            self.set_size(size)
+            return size
+        return self._layout_child(constraints)
+
+    def _layout_child(self, constraints: BoxConstraints):
+        # one generator for every sizing mode, the engine pays per generator
+        child = self.child
+        width = _fit(self.width, constraints.max_width)
+        height = _fit(self.height, constraints.max_height)
+        border = self.border
+        border_width = border.left.width + border.right.width
+        border_width_vert = border.top.width + border.bottom.width
+        child_size = yield child, (
             BoxConstraints(
                 0,
                 0,
-                constraints.max_width - border_width,
-                height - border_width_vert,
+                (constraints.max_width if width is None else width) - border_width,
+                (constraints.max_height if height is None else height)
+                - border_width_vert,
             )
         )
-
-        self.child.offset = Position(
-            self.border.left.width,
-            (height - child_size.height) / 2 + self.border.top.width,
+        size = Size(
+            child_size.width + border_width if width is None else width,
+            child_size.height + border_width_vert if height is None else height,
         )
-        size = Size(child_size.width + border_width, height)
+        self.set_size(size)
+        self._place_child(size)
         return size
 
-    def _layout_with_size(self, constraints: BoxConstraints):
-        # breakpoint()
-        border_width = self.border.left.width + self.border.right.width
-        border_width_vert = self.border.top.width + self.border.bottom.width
-        width = (
-            constraints.max_width
-            if (self.width == INFINITY or self.width > constraints.max_width)
-            else self.width
-        )
-        height = (
-            constraints.max_height
-            if (self.height == INFINITY or self.height > constraints.max_height)
-            else self.height
-        )
-        if not self.child:
-            return Size(width, height)
-
-        self.child.layout(
-            BoxConstraints(
-                0,
-                0,
-                width - border_width,
-                height - border_width_vert,
+    def _leaf_size(self, constraints: BoxConstraints) -> Size:
+        if self.width is not None and self.height is not None:
+            return Size(
+                _fit(self.width, constraints.max_width),
+                _fit(self.height, constraints.max_height),
             )
-        )
-        size = Size(width, height)
-        return size
-
-    def _layout_with_nosize(self, constraints: BoxConstraints):
-        border_width = self.border.left.width + self.border.right.width
-        border_width_vert = self.border.top.width + self.border.bottom.width
-
-        if not self.child:
-            return Size(0, 0)
-
-        child_size = self.child.layout(
-            BoxConstraints(
-                0,
-                0,
-                constraints.max_width - border_width,
-                constraints.max_height - border_width_vert,
+        if self.width is not None:
+            return Size(self.width, 0)
+        if self.height is not None:
+            return Size(0, self.height)
+        return Size(0, 0)
+
+    def _place_child(self, size: Size):
+        """center the laid out child in the client area of a box of `size`"""
+        child = self.child
+        if child:
+            border = self.border
+            left, top = border.left.width, border.top.width
+            client_width = size.width - left - border.right.width
+            client_height = size.height - top - border.bottom.width
+            child.offset = Position(
+                (client_width - child.width) / 2 + left,
+                (client_height - child.height) / 2 + top,
             )
-        )
-
-        size = Size(
-            child_size.width + border_width, child_size.height + border_width_vert
-        )
-        return size
 
-    def draw(self, canvas: Canvas, parent_pos: Position):
+    def draw_steps(self, canvas: Canvas, parent_pos: Position):
         pos = parent_pos.resolve(self.offset)
+        self.paint(canvas, pos)
+        if self.child:
+            return self._draw_child(pos)
+
+    def _draw_child(self, pos: Position):
+        yield self.child, pos
+
+    def paint(self, canvas: Canvas, pos: Position):
+        """draw the box without its child"""
         # self.draw_borders(canvas, pos)
         self._draw_sided_borders(canvas, pos)
-        if self.child:
-            self.child.draw(canvas, pos)
 
     def draw_borders(self, canvas: Canvas, pos: Position):
         lines = self.get_border_lines(pos)
@@ -192,31 +155,33 @@ class Box(SingleChildWidget):
 
     def get_border_lines(self, pos: Position) -> dict:
         """return lines in resolved coordinates"""
+        border = self.border
         x2 = pos.x + self.width
+        y2 = pos.y - self.height
         return {
             "top": Line(
                 pos.x,
-                pos.y - self.border.top.width / 2,
+                pos.y - border.top.width / 2,
                 x2,
-                pos.y - self.border.top.width / 2,
+                pos.y - border.top.width / 2,
             ),
             "right": Line(
-                x2 - self.border.right.width / 2,
+                x2 - border.right.width / 2,
                 pos.y,
-                x2 - self.border.right.width / 2,
-                pos.y - self.height,
+                x2 - border.right.width / 2,
+                y2,
             ),
             "bottom": Line(
                 pos.x,
-                pos.y - self.height + self.border.bottom.width / 2,
+                y2 + border.bottom.width / 2,
                 x2,
-                pos.y - self.height + self.border.bottom.width / 2,
+                y2 + border.bottom.width / 2,
             ),
             "left": Line(
-                pos.x + self.border.left.width / 2,
+                pos.x + border.left.width / 2,
                 pos.y,
-                pos.x + self.border.left.width / 2,
-                pos.y - self.height,
+                pos.x + border.left.width / 2,
+                y2,
             ),
         }
 
@@ -233,6 +198,5 @@ class Box(SingleChildWidget):
             if side.width > 0:
                 line: Line = lines[name]
                 canvas.setLineWidth(side.width)
-                color = side.color.normalize()
-                canvas.setStrokeColorRGB(color.r, color.g, color.b, color.a)
+                canvas.setStrokeColorRGB(*side.color.rgb, side.color.alpha)
                 canvas.line(line.x1, line.y1, line.x2, line.y2)
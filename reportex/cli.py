@@ -1,8 +1,12 @@
 import os
+import sys
 import json
+import time
 import argparse
 import pathlib
-from reportex.core import FontsManager, BASE_DIR
+from reportex.core import FontsManager
+from reportex.exceptions import BatchError, FontError
+from reportex.image_cache import ImageCache
 
 
 
@@ -13,6 +17,9 @@ def run():
 
     create_font_parser(subparsers)
     create_cache_parser(subparsers)
+    create_render_parser(subparsers)
+    create_bench_parser(subparsers)
+    create_profile_parser(subparsers)
     
 
     args = main_parser.parse_args()
@@ -30,10 +37,16 @@ def create_font_parser(main_subsparsers: argparse.ArgumentParser):
     fontreg_parser = font_subparsers.add_parser(
         "register", help="this command is used to register ttf fonts"
     )
+    fontreg_parser.add_argument(
+        "ttf_files", nargs="*", help="ttf files to register, named after the file"
+    )
     fontreg_parser.add_argument("-ttf", "--ttf_file", help="path to ttf file")
     fontreg_parser.add_argument(
         "-n", "--name", help="the name to register the font against"
     )
+    fontreg_parser.add_argument(
+        "-w", "--workers", type=int, help="processes parsing the fonts"
+    )
     fontreg_parser.set_defaults(fn=handle_register_font)
 
 
@@ -45,19 +58,211 @@ def create_cache_parser(main_subparser: argparse._SubParsersAction):
     image_parser = cache_subparsers.add_parser("image")
     image_parser.add_argument("-cl", "--clear", action="store_true", help="clear the image cache")
     image_parser.set_defaults(fn=handle_image_parser)
+    image_subparsers = image_parser.add_subparsers(title="image cache commands")
+
+    stats_parser = image_subparsers.add_parser(
+        "stats", help="entries, size and hit rate of the cache"
+    )
+    stats_parser.set_defaults(fn=handle_image_stats)
+
+    prune_parser = image_subparsers.add_parser(
+        "prune", help="evict the least recently used images"
+    )
+    prune_parser.add_argument(
+        "--max-size", type=_parse_size, help="bytes to keep at most, e.g. 200M"
+    )
+    prune_parser.add_argument(
+        "--max-age", type=_parse_age, help="evict images unused for longer, e.g. 7d"
+    )
+    prune_parser.set_defaults(fn=handle_image_prune)
+
+    warm_parser = image_subparsers.add_parser(
+        "warm", help="download the images of a url list ahead of time"
+    )
+    warm_parser.add_argument("urls", help="file with one url per line")
+    warm_parser.add_argument(
+        "-w", "--workers", type=int, default=8, help="parallel downloads"
+    )
+    warm_parser.set_defaults(fn=handle_image_warm)
+
+
+_SIZE_UNITS = {"k": 1024, "m": 1024**2, "g": 1024**3}
+_AGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def _parse_size(value: str) -> int:
+    unit = value[-1:].lower()
+    if unit in _SIZE_UNITS:
+        return int(float(value[:-1]) * _SIZE_UNITS[unit])
+    return int(value)
+
+
+def _parse_age(value: str) -> float:
+    unit = value[-1:].lower()
+    if unit in _AGE_UNITS:
+        return float(value[:-1]) * _AGE_UNITS[unit]
+    return float(value)
+
+
+
+
+def create_render_parser(main_subparser: argparse._SubParsersAction):
+    render_parser = main_subparser.add_parser(
+        "render", help="render documents from a template and a data file"
+    )
+    render_parser.add_argument(
+        "template", help="python file defining pages(record) -> list[Page]"
+    )
+    render_parser.add_argument(
+        "-d", "--data", required=True, help="records to render, .jsonl or .csv"
+    )
+    render_parser.add_argument(
+        "-o", "--out-dir", default=".", help="where the pdfs are written"
+    )
+    render_parser.add_argument(
+        "--name-field", help="record field to name each pdf after, else its index"
+    )
+    # one document is rendered by one process
+    output = render_parser.add_mutually_exclusive_group()
+    output.add_argument(
+        "-w", "--workers", type=int, help="worker processes, one per cpu by default"
+    )
+    output.add_argument(
+        "--merge",
+        metavar="NAME",
+        help="render every record into the one pdf NAME in out-dir instead",
+    )
+    render_parser.set_defaults(fn=handle_render)
+
+
+def handle_render(args):
+    from reportex import batch
+
+    template = pathlib.Path(args.template).resolve()
+    records = batch.read_records(pathlib.Path(args.data))
+    out_dir = pathlib.Path(args.out_dir)
+    start = time.perf_counter()
+    if args.merge:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        results = [batch.render_merged(template, records, str(out_dir / args.merge))]
+    else:
+        workers = args.workers or os.cpu_count()
+        try:
+            results = batch.render_each(
+                template, records, out_dir, workers, args.name_field
+            )
+        except BatchError as err:
+            print(f"\n{err.msg}\n")
+            sys.exit(1)
+    stats = batch.summary(results, time.perf_counter() - start)
+
+    print()
+    print(f"   documents  {stats['documents']}  pages  {stats['pages']}")
+    print(
+        f"   {stats['seconds']:.2f}s  {stats['docs/s']:.1f} docs/s"
+        f"  {stats['pages/s']:.1f} pages/s"
+    )
+    print(
+        f"   latency  p50 {stats['p50'] * 1000:.1f}ms  p90 {stats['p90'] * 1000:.1f}ms"
+        f"  p99 {stats['p99'] * 1000:.1f}ms"
+    )
+    print()
+
+
+def create_bench_parser(main_subparser: argparse._SubParsersAction):
+    bench_parser = main_subparser.add_parser(
+        "bench", help="time the built in synthetic workloads"
+    )
+    bench_parser.add_argument(
+        "workloads", nargs="*", help="workloads to run, all of them if none given"
+    )
+    bench_parser.add_argument(
+        "-n", "--iterations", type=int, default=20, help="documents per workload"
+    )
+    bench_parser.add_argument(
+        "--json", action="store_true", help="print the results as json"
+    )
+    bench_parser.set_defaults(fn=handle_bench)
 
 
+def handle_bench(args):
+    from reportex import bench
+
+    unknown = set(args.workloads) - set(bench.WORKLOADS)
+    if unknown:
+        print(f"unknown workloads: {', '.join(sorted(unknown))}")
+        print(f"available: {', '.join(bench.WORKLOADS)}")
+        return
+    results = bench.run_workloads(args.workloads, args.iterations)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print()
+    bench.report_table(results)
+    print()
+
+
+def create_profile_parser(main_subparser: argparse._SubParsersAction):
+    profile_parser = main_subparser.add_parser(
+        "profile", help="time layout and draw per widget class while a script runs"
+    )
+    profile_parser.add_argument("script", help="python script that renders a document")
+    profile_parser.add_argument(
+        "-t", "--top", type=int, default=20, help="widget classes to show"
+    )
+    profile_parser.set_defaults(fn=handle_profile)
+
+
+def handle_profile(args):
+    from reportex.profiling import profile_script
+
+    rows = profile_script(args.script).rows()[: args.top]
+    print()
+    print(
+        f"{'widget':>20}{'layout calls':>14}{'layout ms':>12}"
+        f"{'draw calls':>12}{'draw ms':>10}"
+    )
+    for row in rows:
+        print(
+            f"{row['widget']:>20}{row['layout calls']:>14}"
+            f"{row['layout s'] * 1000:>12.2f}{row['draw calls']:>12}"
+            f"{row['draw s'] * 1000:>10.2f}"
+        )
+    print()
 
 
 def handle_image_parser(args):
     if not args.clear:
         return
+    ImageCache().clear()
 
-    dr = BASE_DIR/"reportex"/"cache"
-    for fl in os.listdir(dr):
-        os.remove(dr/fl)
-    with open(dr/"network_images.json", "w") as f:
-        json.dump({}, f)
+
+def handle_image_stats(args):
+    stats = ImageCache().stats()
+    print()
+    print(f"   entries   {stats['entries']}")
+    print(f"   size      {stats['bytes'] / 1024:.1f} KB")
+    print(f"   hit rate  {stats['hit rate']:.1%} of {stats['lookups']} lookups")
+    print()
+
+
+def handle_image_prune(args):
+    if args.max_size is None and args.max_age is None:
+        print("[max-size] or [max-age] is required")
+        return
+    evicted = ImageCache().prune(args.max_size, args.max_age)
+    freed = sum(entry.size for entry in evicted)
+    print(f"\nevicted {len(evicted)} images, {freed / 1024:.1f} KB freed\n")
+
+
+def handle_image_warm(args):
+    with open(args.urls) as f:
+        urls = [line.strip() for line in f if line.strip()]
+    counts = ImageCache().warm(urls, args.workers)
+    print(
+        f"\nfetched {counts['fetched']}, already cached {counts['cached']},"
+        f" failed {counts['failed']}\n"
+    )
 
 
 
@@ -70,8 +275,24 @@ def list_fonts(args):
 
 
 def handle_register_font(args):
-    if not (args.ttf_file or args.name):
-        print("[name] and [ttf] are required")
+    if args.ttf_files:
+        paths = [pathlib.Path(path) for path in args.ttf_files]
+        try:
+            added = FontsManager.register_ttfs(paths, workers=args.workers)
+        except FontError as err:
+            print(f"\n{err.msg}\n")
+            sys.exit(1)
+        print()
+        for fnt in added:
+            print(f"font: [{fnt['name']}] added successfully")
+        print()
         return
-    FontsManager.register_ttf(args.name, pathlib.Path(args.ttf_file))
+    if not (args.ttf_file and args.name):
+        print("[name] and [ttf] are required")
+        sys.exit(1)
+    try:
+        FontsManager.register_ttf(args.name, pathlib.Path(args.ttf_file))
+    except FontError as err:
+        print(f"\n{err.msg}\n")
+        sys.exit(1)
     print(f"\nfont: [{args.name}] added successfully\n")
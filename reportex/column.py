@@ -9,10 +9,11 @@ from reportex.core import (
 
 from reportex.widgets import Expanded, Canvas
 
+from reportex.engine import Stepped
 from reportex.exceptions import OverFlowError
 
 
-class Column(MultiChildrenWidget):
+class Column(Stepped, MultiChildrenWidget):
     def __init__(
         self,
         children,
@@ -42,7 +43,7 @@ class Column(MultiChildrenWidget):
                 flex += child.flex
         return flex
 
-    def layout(self, constraints: BoxConstraints) -> Size:
+    def layout_steps(self, constraints: BoxConstraints):
         size = Size(0, constraints.max_height)
         if len(self.children) == 0:
             self.set_size(Size(0, 0))
@@ -57,11 +58,16 @@ class Column(MultiChildrenWidget):
                 expanded.append(child)
                 continue
 
-            child_size = child.layout(
+            child_size = yield child, (
                 BoxConstraints(0, 0, constraints.max_width, remheight)
             )
             if remheight == 0 and (child.width > 0 or child.height > 0):
-                raise OverFlowError(f"insufficient space for {child}")
+                raise OverFlowError(
+                    f"insufficient space for {child}",
+                    widget=child,
+                    required=child_size,
+                    available=Size(constraints.max_width, remheight),
+                )
             if child_size.width > size.width:
                 size.width = child_size.width
 
@@ -69,7 +75,12 @@ class Column(MultiChildrenWidget):
                 child_size.height > remheight
                 or child_size.width > constraints.max_width
             ):
-                raise OverFlowError(f"insufficient space for {child}")
+                raise OverFlowError(
+                    f"insufficient space for {child}",
+                    widget=child,
+                    required=child_size,
+                    available=Size(constraints.max_width, remheight),
+                )
 
             remheight -= child_size.height
 
@@ -77,14 +88,18 @@ class Column(MultiChildrenWidget):
             height_frac = remheight / total_flex
             for exp in expanded:
                 ht = height_frac * exp.flex
-                exp_size = exp.layout(BoxConstraints(0, 0, constraints.max_width, ht))
+                exp_size = yield exp, BoxConstraints(0, 0, constraints.max_width, ht)
                 if exp_size.width > size.width:
                     size.width = exp_size.width
                 if (
                     exp_size.height > remheight
                     or exp_size.width > constraints.max_width
                 ):
-                    raise OverFlowError()
+                    raise OverFlowError(
+                        widget=exp,
+                        required=exp_size,
+                        available=Size(constraints.max_width, remheight),
+                    )
                 remheight -= ht
 
         match (self.main_axis_alignment):
@@ -157,7 +172,7 @@ class Column(MultiChildrenWidget):
             child.offset = Position(x, y + space + (constraints.max_height - rheight))
             rheight -= child.height + space
 
-    def draw(self, canvas: Canvas, parent_pos: Position):
+    def draw_steps(self, canvas: Canvas, parent_pos: Position):
         pos = parent_pos.resolve(self.offset)
         for child in self.children:
-            child.draw(canvas, pos)
+            yield child, pos
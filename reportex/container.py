@@ -35,16 +35,10 @@ class Container(Box):
         self.color = color
         self.shadow = shadow
 
-    def layout(self, constraints: BoxConstraints) -> Size:
-        return super().layout(constraints)
-
-    def draw(self, canvas: Canvas, parent_pos: Position):
-        # breakpoint()
-        pos = parent_pos.resolve(self.offset)
+    def paint(self, canvas: Canvas, pos: Position):
         origin = self.client_origin
         canvas.saveState()
-        c = self.color.normalize()
-        canvas.setFillColorRGB(c.r, c.g, c.b, c.a)
+        canvas.setFillColorRGB(*self.color.rgb, self.color.alpha)
         canvas.rect(
             pos.resolvex(origin.x),
             pos.resolvey(origin.y) - self.client_height,
@@ -54,7 +48,7 @@ class Container(Box):
             stroke=False,
         )
         canvas.restoreState()
-        super().draw(canvas, parent_pos)
+        super().paint(canvas, pos)
 
     def _draw_shadow(self, canvas: Canvas, pos: Position):
         canvas.saveState()
@@ -1,13 +1,19 @@
+import os
 import shutil
 import json
+import uuid
 import pathlib
 import abc
 import enum
+import weakref
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextvars import ContextVar
 from dataclasses import dataclass
 from reportlab.pdfgen.canvas import Canvas
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfbase.ttfonts import TTFont, TTFError
 from reportex.exceptions import FontError
 
 
@@ -15,7 +21,7 @@ INFINITY = 10000
 DISC = 1 / 5000
 
 
-@dataclass
+@dataclass(slots=True)
 class BoxConstraints:
     min_width: float
     min_height: float
@@ -52,13 +58,13 @@ class EdgeInset:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Size:
     width: float
     height: float
 
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     x: float
     y: float
@@ -73,10 +79,99 @@ class Position:
         return self.y - y
 
 
-class DocInfo:
+# the layout state of the `reportex.render.RenderTree` active in this context,
+# object -> {field: value}
+_layout_state: ContextVar[dict | None] = ContextVar("_layout_state", default=None)
+_NO_DEFAULT = object()
+
+
+class LayoutField:
+    """an attribute that layout and draw set.
+
+    while a `RenderTree` is active the values are kept in the tree and reads
+    fall back to what the object was built with, so laying a widget out never
+    changes it. without a tree they are plain attributes.
+
+    the fields stay plain class attributes, and cost nothing, until the first
+    render tree is made, `arm` puts the descriptors in place then. a `built`
+    field is also a setting the widget is built with, like a fixed `width`.
+    """
+
+    __slots__ = ("name", "default", "built")
+
+    # class -> its fields, armed or not
+    declared: dict[type, list["LayoutField"]] = {}
+    armed = False
+    _lock = threading.Lock()
+
+    def __init__(self, default=_NO_DEFAULT, *, built: bool = False):
+        self.default = default
+        self.built = built
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        LayoutField.declared.setdefault(owner, []).append(self)
+        if not LayoutField.armed:
+            if self.default is _NO_DEFAULT:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, self.default)
+
+    @classmethod
+    def arm(cls):
+        with cls._lock:
+            if cls.armed:
+                return
+            for owner, fields in cls.declared.items():
+                for field in fields:
+                    setattr(owner, field.name, field)
+            cls.armed = True
+
+    @classmethod
+    def derived(cls, owner: type) -> frozenset[str]:
+        """the fields of `owner` only layout and draw set"""
+        return frozenset(
+            field.name
+            for base in owner.__mro__
+            for field in cls.declared.get(base, ())
+            if not field.built
+        )
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        state = _layout_state.get()
+        if state is not None:
+            fields = state.get(obj)
+            if fields is not None:
+                value = fields.get(self.name, _NO_DEFAULT)
+                if value is not _NO_DEFAULT:
+                    return value
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            if self.default is _NO_DEFAULT:
+                raise AttributeError(self.name) from None
+            return self.default
+
+    def __set__(self, obj, value):
+        state = _layout_state.get()
+        if state is None:
+            obj.__dict__[self.name] = value
+            return
+        fields = state.get(obj)
+        if fields is None:
+            fields = state[obj] = {}
+        fields[self.name] = value
+
+
+class _DocInfo:
     page: Size = Size(A4[0], A4[1])
 
 
+DocInfo = _DocInfo()
+
+
 def Rect(canvas: Canvas, x, y, width, height):
     canvas.rect(x, y - height, width, height)
 
@@ -110,13 +205,22 @@ class MainAxisAlignment(enum.Enum):
     SPACE_BETWEEN = enum.auto()
 
 
+class TextOverflow(enum.Enum):
+    """what a text does with lines that don't fit its height"""
+
+    CLIP = enum.auto()
+    ELLIPSIS = enum.auto()
+    SHRINK_TO_FIT = enum.auto()
+
+
 class Widget(abc.ABC):
-    width: float | None
-    height: float | None
-    offset: float | None
+    width: float | None = LayoutField(built=True)
+    height: float | None = LayoutField(built=True)
+    offset: Position | None = LayoutField()
+    position: Position = LayoutField()
     canvas: Canvas
 
-    parent: "Widget"
+    parent: "Widget" = LayoutField()
 
     def __init__(self, width=None, height=None):
         self.width = width
@@ -134,6 +238,14 @@ class Widget(abc.ABC):
         self.width = size.width
         self.height = size.height
 
+    def intrinsic_widths(self) -> tuple[float, float]:
+        """(min, max) width the widget needs, measured without a layout.
+
+        min is the narrowest width that doesn't break inside a word, max the
+        width it takes when nothing wraps.
+        """
+        return 0, 0
+
     def set_position(self, pos: Position):
         self.position = pos
 
@@ -160,14 +272,34 @@ class SingleChildWidget(Widget):
     def client_origin(self):
         return Position(0, 0)
 
+    def intrinsic_widths(self) -> tuple[float, float]:
+        if self.child is None:
+            return 0, 0
+        return self.child.intrinsic_widths()
+
 
 class MultiPageWidget(Widget):
-    page_offset: Position
+    """a widget that continues on over pages. `page_offset` is where it
+    starts on its first page, set before its layout"""
+
+    page_offset: Position = LayoutField()
 
     def __init__(self, width=None, height=None):
         super().__init__(width, height)
         self.page_offset = Position(0, 0)
 
+    @property
+    def page_count(self) -> int:
+        return 1
+
+    def page_used(self, page: int) -> float:
+        """height the widget takes on its `page`-th page"""
+        return self.height
+
+    def draw_page(self, canvas: Canvas, pos: Position, page: int):
+        """draw the `page`-th page of the widget with its top left at `pos`"""
+        self.draw(canvas, pos.resolve(Position(-self.offset.x, -self.offset.y)))
+
 
 class MultiPageSingleWidget(MultiPageWidget):
     ...
@@ -199,16 +331,84 @@ class MultiChildrenWidget(Widget):
     def client_origin(self):
         return Position(0, 0)
 
+    def intrinsic_widths(self) -> tuple[float, float]:
+        min_width = max_width = 0
+        for child in self.children:
+            cmin, cmax = child.intrinsic_widths()
+            min_width = max(min_width, cmin)
+            max_width = max(max_width, cmax)
+        return min_width, max_width
+
+
+class Interned:
+    """base of the immutable style values. instances are interned on their
+    fields, so equal values are one shared object and compare by identity"""
+
+    __slots__ = ("_key", "__weakref__")
+    # the constructor arguments the key is made of, in order
+    _key_fields: tuple[str, ...] = ()
+    # threads creating equal values must end up with the same one
+    _lock = threading.Lock()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._interned = weakref.WeakValueDictionary()
 
-class Color:
-    def __init__(self, r, g, b, a=255):
-        self.r = r
-        self.g = g
-        self.b = b
-        self.a = a
+    @classmethod
+    def _intern(cls, key: tuple, **fields):
+        obj = cls._interned.get(key)
+        if obj is not None:
+            return obj
+        with cls._lock:
+            obj = cls._interned.get(key)
+            if obj is None:
+                obj = object.__new__(cls)
+                object.__setattr__(obj, "_key", key)
+                for name, value in fields.items():
+                    object.__setattr__(obj, name, value)
+                cls._interned[key] = obj
+        return obj
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return _rebuild, (type(self), dict(zip(self._key_fields, self._key)))
+
+    def __repr__(self):
+        return f"{type(self).__name__}{self._key!r}"
+
+
+def _rebuild(cls, fields: dict):
+    return cls(**fields)
+
+
+class Color(Interned):
+    """an rgba color with 0-255 channels. `rgb` and `alpha` hold the channels
+    scaled to 0-1, ready for the canvas"""
+
+    __slots__ = ("r", "g", "b", "a", "rgb", "alpha", "_normalized")
+    _key_fields = ("r", "g", "b", "a")
+
+    def __new__(cls, r, g, b, a=255):
+        return cls._intern(
+            (r, g, b, a),
+            r=r,
+            g=g,
+            b=b,
+            a=a,
+            rgb=(r / 255, g / 255, b / 255),
+            alpha=a / 255,
+            _normalized=None,
+        )
 
     def normalize(self) -> "Color":
-        return Color(self.r / 255, self.g / 255, self.b / 255, self.a / 255)
+        if self._normalized is None:
+            object.__setattr__(self, "_normalized", Color(*self.rgb, self.alpha))
+        return self._normalized
 
 
 class Colors:
@@ -240,29 +440,33 @@ class Colors:
     wheet = Color(245, 222, 179, 255)
 
 
-class BorderSide:
-    def __init__(self, *, width=1, color: Color = Colors.black):
-        self.width = width
-        self.color = color
+class BorderSide(Interned):
+    __slots__ = ("width", "color")
+    _key_fields = ("width", "color")
+
+    def __new__(cls, *, width=1, color: Color = Colors.black):
+        return cls._intern((width, color), width=width, color=color)
 
     @classmethod
     def zero(cls):
         return cls(width=0, color=Colors.white)
 
 
-class Border:
-    def __init__(
-        self,
+class Border(Interned):
+    __slots__ = ("left", "top", "right", "bottom")
+    _key_fields = ("left", "top", "right", "bottom")
+
+    def __new__(
+        cls,
         *,
         left: BorderSide | None = None,
         top: BorderSide | None = None,
         right: BorderSide | None = None,
         bottom: BorderSide | None = None,
     ):
-        self.left = left
-        self.top = top
-        self.right = right
-        self.bottom = bottom
+        return cls._intern(
+            (left, top, right, bottom), left=left, top=top, right=right, bottom=bottom
+        )
 
     @classmethod
     def zero(cls):
@@ -288,15 +492,8 @@ class Border:
         return cls(left=side, top=side, right=side, bottom=side)
 
     def is_all_sided(self) -> bool:
-        # breakpoint()
         sd = BorderSide()
-        for side in [self.left, self.top, self.right, self.bottom]:
-            if not side:
-                return False
-            elif side.color != sd.color or side.width != sd.width:
-                return False
-
-        return True
+        return all(side is sd for side in self.sides)
 
     @property
     def sides(self) -> list[BorderSide]:
@@ -317,10 +514,33 @@ def available_fonts() -> list[str]:
 BASE_DIR = pathlib.Path(__file__).parent.parent
 
 
+def _inspect_ttf(path: pathlib.Path) -> dict:
+    """parse a ttf file, its metrics in 1/1000 em or the reason it is unusable"""
+    try:
+        face = TTFont(path.stem, path).face
+    except (TTFError, OSError) as err:
+        return {"error": str(err)}
+    return {
+        "ascent": face.ascent,
+        "descent": face.descent,
+        "default_width": face.defaultWidth,
+        "widths": {str(code): width for code, width in face.charWidths.items()},
+    }
+
+
+def _write_json(path: pathlib.Path, obj):
+    # written aside and moved over the old file, which is never half written
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+    with open(tmp, "w") as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
+
+
 class FontsManager:
     __fonts = []
     canvas: Canvas = None
     font_dir = BASE_DIR / "reportex" / "fonts"
+    _metrics: dict | None = None
 
     @classmethod
     def init(cls):
@@ -342,23 +562,90 @@ class FontsManager:
 
     @classmethod
     def register_ttf(cls, name, path: pathlib.Path):
-        if not (
-            path.exists
-            and path.is_file
-            and path.suffix != ""
-            and path.suffix[1:] == "ttf"
-        ):
-            raise FontError("invalid tff file path")
-        fl = pathlib.Path(shutil.copy(path, cls.font_dir))
+        cls.register_ttfs([path], [name])
+
+    @classmethod
+    def register_ttfs(
+        cls,
+        paths: list[pathlib.Path],
+        names: list[str] | None = None,
+        workers: int | None = None,
+    ) -> list[dict]:
+        """register a batch of ttf files, named after their file unless
+        `names` are given.
+
+        the fonts are parsed and validated in parallel and nothing is
+        registered unless all of them are usable. each font's entry in
+        `conf.json` keeps its metrics, the character widths text is measured
+        with, so the one atomic rewrite of `conf.json` registers the batch. the
+        font files are moved in before it, a crash leaves at most unused files.
+        """
+        paths = [pathlib.Path(path) for path in paths]
+        names = list(names) if names else [path.stem for path in paths]
+        registered = cls.registered_fonts
+        taken = {fnt["name"] for fnt in registered}
+        files = {fnt["fname"] for fnt in registered}
+        problems = []
+        for name, path in zip(names, paths):
+            if not (path.is_file() and path.suffix.lower() == ".ttf"):
+                problems.append(f"{path}: not a ttf file")
+            if name in taken:
+                problems.append(f"{path}: a font named {name!r} is registered")
+            if path.name in files:
+                problems.append(f"{path}: a font file {path.name} is registered")
+            taken.add(name)
+            files.add(path.name)
+        if problems:
+            raise FontError("invalid fonts:\n" + "\n".join(problems))
+
+        if len(paths) > 1:
+            with ProcessPoolExecutor(workers) as pool:
+                inspected = list(pool.map(_inspect_ttf, paths))
+        else:
+            # not worth starting processes for
+            inspected = [_inspect_ttf(path) for path in paths]
+        problems = [
+            f"{path}: {info['error']}"
+            for path, info in zip(paths, inspected)
+            if "error" in info
+        ]
+        if problems:
+            raise FontError("invalid fonts:\n" + "\n".join(problems))
+
+        added = []
+        entries = []
+        for name, path, info in zip(names, paths, inspected):
+            fl = cls.font_dir / path.name
+            # copied aside first, a file in font_dir is never half copied
+            tmp = fl.with_name(f".{fl.name}.{uuid.uuid4().hex}")
+            shutil.copy(path, tmp)
+            os.replace(tmp, fl)
+            added.append({"name": name, "fname": fl.name})
+            entries.append({"name": name, "fname": fl.name, "metrics": info})
+
         conf = cls.font_dir / "conf.json"
         with open(conf) as f:
             cont = json.load(f)
+        cont["registered"].extend(entries)
+        _write_json(conf, cont)
+        if cls._metrics is not None:
+            cls._metrics.update((fnt["name"], fnt["metrics"]) for fnt in entries)
+        return added
 
-        obj = {"name": name, "fname": fl.name}
-        cont["registered"].append(obj)
+    @classmethod
+    def _load_metrics(cls) -> dict:
+        if cls._metrics is None:
+            cls._metrics = {
+                fnt["name"]: fnt["metrics"]
+                for fnt in cls.registered_fonts
+                if "metrics" in fnt
+            }
+        return cls._metrics
 
-        with open(conf, "w") as f:
-            json.dump(cont, f)
+    @classmethod
+    def metrics(cls, name: str) -> dict | None:
+        """the cached metrics of a font registered with `register_ttfs`"""
+        return cls._load_metrics().get(name)
 
     @classmethod
     @property
@@ -0,0 +1,103 @@
+import itertools
+
+import reportlab.pdfbase.pdfmetrics as metrics
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.pdfgen.pathobject import PDFPathObject
+
+from reportex.exceptions import RecordingError
+
+
+_form_ids = itertools.count()
+
+
+def _recorder(owner, name: str):
+    if name.startswith("_"):
+        raise AttributeError(name)
+    if name.startswith("get"):
+        # a recording is drawn again elsewhere, it can't depend on the answer
+        raise RecordingError(f"{name} can't be answered while recording")
+
+    def record(*args, **kwargs):
+        owner.ops.append((name, args, kwargs))
+
+    return record
+
+
+class _RecordedText:
+    def __init__(self, args, kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        self.ops: list[tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name):
+        return _recorder(self, name)
+
+
+class RecordingCanvas:
+    """stands in for a `Canvas` and keeps the calls made on it.
+
+    drawing queries can't be answered without a real canvas, so only the
+    pure ones (`stringWidth`, `beginPath`) are supported, the others
+    (`getPageNumber`, `getAvailableFonts`, ...) raise `RecordingError`.
+    """
+
+    def __init__(self):
+        self.ops: list[tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name):
+        return _recorder(self, name)
+
+    def beginText(self, *args, **kwargs):
+        return _RecordedText(args, kwargs)
+
+    def beginPath(self):
+        # path objects don't depend on the canvas, the recorded `drawPath`
+        # call keeps a reference to the finished path
+        return PDFPathObject()
+
+    def stringWidth(self, text, fontName, fontSize):
+        return metrics.stringWidth(text, fontName, fontSize)
+
+    def display_list(self, width: float, height: float) -> "DisplayList":
+        return DisplayList(self.ops, width, height)
+
+
+class DisplayList:
+    """draw calls of a widget subtree, relative to the subtree's top left corner"""
+
+    def __init__(self, ops: list[tuple[str, tuple, dict]], width, height):
+        self.ops = ops
+        self.width = width
+        self.height = height
+        self.form_name = f"reportex_dl{next(_form_ids)}"
+
+    def play(self, canvas: Canvas):
+        for name, args, kwargs in self.ops:
+            if name == "drawText":
+                text: _RecordedText = args[0]
+                obj = canvas.beginText(*text.args, **text.kwargs)
+                for tname, targs, tkwargs in text.ops:
+                    getattr(obj, tname)(*targs, **tkwargs)
+                canvas.drawText(obj)
+            else:
+                getattr(canvas, name)(*args, **kwargs)
+
+    def replay(self, canvas: Canvas, x: float, y: float):
+        canvas.saveState()
+        canvas.translate(x, y)
+        self.play(canvas)
+        canvas.restoreState()
+
+    def define_form(self, canvas: Canvas):
+        if canvas.hasForm(self.form_name):
+            return
+        canvas.beginForm(self.form_name, 0, -self.height, self.width, 0)
+        self.play(canvas)
+        canvas.endForm()
+
+    def draw_form(self, canvas: Canvas, x: float, y: float):
+        self.define_form(canvas)
+        canvas.saveState()
+        canvas.translate(x, y)
+        canvas.doForm(self.form_name)
+        canvas.restoreState()
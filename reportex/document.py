@@ -1,3 +1,7 @@
+import asyncio
+from concurrent.futures import Executor
+from contextlib import contextmanager
+
 from reportlab.pdfgen.canvas import Canvas
 from reportlab.lib.pagesizes import A4
 from reportex.core import (
@@ -10,6 +14,12 @@ from reportex.core import (
 
 from reportex.image import Image
 from reportex.text import Text
+from reportex.state_canvas import StateCanvas
+from reportex.exceptions import OverFlowError
+from reportex.multpage import MultiPage
+from reportex.spatial import LayoutIndex, laid_out, widget_path
+from reportex.references import PAGES, Anchor, References
+from reportex.render import RenderTree
 
 
 class Page(SingleChildWidget):
@@ -32,15 +42,22 @@ class Page(SingleChildWidget):
     def client_origin(self):
         return super().client_origin
 
+    @property
+    def page_count(self) -> int:
+        """pdf pages the laid out page takes"""
+        if isinstance(self.child, MultiPage):
+            return self.child.page_count
+        return 1
+
     def layout(self, constraints: BoxConstraints) -> Size:
         size = Size(
             constraints.max_width - (2 * self.margin),
             constraints.max_height - (2 * self.margin),
         )
-
+        # sized first, a `MultiPage` continues on pages of this size
+        self.set_size(Size(constraints.max_width, constraints.max_height))
         self.child.layout(BoxConstraints(0, 0, size.width, size.height))
         self.child.offset = Position(self.margin, self.margin)
-        self.set_size(Size(constraints.max_width, constraints.max_height))
         return size
 
     def draw(self, canvas: Canvas, parent_pos: Position):
@@ -58,24 +75,137 @@ class Page(SingleChildWidget):
 
 
 class Document(Widget):
-    def __init__(self, *, doc_name, page_size=A4, pages: list[Page]):
+    def __init__(
+        self,
+        *,
+        doc_name,
+        page_size=A4,
+        pages: list[Page],
+        optimize_operators: bool = True,
+        index_layout: bool = False,
+        isolate_layout: bool = False,
+    ):
         super().__init__(None, None)
         self.pages = pages
         self.page_size = page_size
         self.doc_name = doc_name
         self.offset = Position(0, 0)
+        self.optimize_operators = optimize_operators
+        self.index_layout = index_layout
+        # set after layout when `index_layout` is on
+        self.layout_index: LayoutIndex | None = None
+        # known after layout, without drawing anything
+        self.page_count = 0
+        self.references = References()
+        # with `isolate_layout` the pages are laid out into `render_tree` and
+        # left as they were built, so the same pages can be rendered by other
+        # documents at the same time. their layout is then only seen with the
+        # tree active, `with doc.render_tree.active(): ...`
+        self.isolate_layout = isolate_layout
+        self.render_tree: RenderTree | None = None
+
+    def make_canvas(self) -> Canvas:
+        canvas = Canvas(self.doc_name, self.page_size)
+        if self.optimize_operators:
+            return StateCanvas(canvas)
+        return canvas
 
     def create(self):
-        print("page size: ", self.page_size)
-        canvas = Canvas(self.doc_name, self.page_size)
+        canvas = self.make_canvas()
         self.layout(BoxConstraints(0, 0, self.page_size[0], self.page_size[1]))
-        self.draw(canvas, Position(0, self.page_size[1]))
+        self.begin_references()
+        with self._active():
+            self.draw(canvas, Position(0, self.page_size[1]))
+            self.fill_references(canvas)
         canvas.save()
 
-    def layout(self, constraints: BoxConstraints) -> Size:
-        size = Size(constraints.max_width, constraints.max_height)
-        self.set_size(size)
+    async def acreate(self, executor: Executor | None = None):
+        """render the document without blocking the running event loop.
+
+        layout and drawing are cpu bound, so each page is handed to `executor`
+        (the loop's default executor when None). the coroutine yields back to
+        the loop between pages, which is where a cancellation takes effect.
+        """
+        loop = asyncio.get_running_loop()
+        canvas = self.make_canvas()
+        constraints = BoxConstraints(0, 0, self.page_size[0], self.page_size[1])
+        self._new_tree()
+        # the executor's threads don't see the tree unless it's run there
+        self._run(self.set_size, Size(constraints.max_width, constraints.max_height))
         for page in self.pages:
+            await loop.run_in_executor(
+                executor, self._run, self._layout_page, page, constraints
+            )
+        self._run(self._count_pages)
+        self.begin_references()
+
+        pos = Position(0, self.page_size[1])
+        for page in self.pages:
+            await loop.run_in_executor(
+                executor, self._run, self._draw_page, canvas, page, pos
+            )
+        self._run(self.fill_references, canvas)
+        await loop.run_in_executor(executor, canvas.save)
+
+    def layout(self, constraints: BoxConstraints) -> Size:
+        """lay the pages out, into a new `render_tree` with `isolate_layout`"""
+        self._new_tree()
+        with self._active():
+            size = Size(constraints.max_width, constraints.max_height)
+            self.set_size(size)
+            for page in self.pages:
+                self._layout_page(page, constraints)
+            self._count_pages()
+        if self.render_tree is not None:
+            self.render_tree.size = size
+        return size
+
+    def _new_tree(self):
+        self.render_tree = RenderTree(self) if self.isolate_layout else None
+
+    @contextmanager
+    def _active(self):
+        """where the layout goes, the render tree or else the widgets, and
+        the references drawn"""
+        with self.references.active():
+            if self.render_tree is None:
+                yield
+                return
+            with self.render_tree.active():
+                yield
+
+    def _run(self, func, *args):
+        with self._active():
+            return func(*args)
+
+    def _count_pages(self):
+        self.page_count = sum(page.page_count for page in self.pages)
+        if self.index_layout:
+            self.layout_index = LayoutIndex.build(self)
+
+    def anchor_pages(self) -> dict[str, int]:
+        """the pdf page, counted from 1, of every `Anchor` of the laid out
+        document. a walk over the layout, nothing is drawn"""
+        with self._active():
+            return {
+                widget.name: page + 1
+                for widget, page, _, _, _ in laid_out(self)
+                if isinstance(widget, Anchor)
+            }
+
+    def begin_references(self):
+        """new references for a render, drawn into while the document is
+        active. kept per document, renders running at once don't mix them"""
+        self.references = References()
+
+    def fill_references(self, canvas: Canvas):
+        """define the forms of the references drawn, before saving"""
+        # every page has been shown, the canvas is on the one after the last
+        self.references.values[PAGES] = str(canvas.getPageNumber() - 1)
+        self.references.fill(canvas)
+
+    def _layout_page(self, page: Page, constraints: BoxConstraints):
+        try:
             page.layout(
                 BoxConstraints(
                     0,
@@ -84,10 +214,18 @@ class Document(Widget):
                     constraints.max_height,
                 )
             )
-            page.offset = Position(0, 0)
-        return size
+        except OverFlowError as err:
+            err.page = self.pages.index(page)
+            if err.widget is not None:
+                err.path = widget_path(err.widget)
+            raise
+        page.offset = Position(0, 0)
 
     def draw(self, canvas: Canvas, parent_pos: Position):
-        for page in self.pages:
-            page.draw(canvas, parent_pos)
-            canvas.showPage()
+        with self._active():
+            for page in self.pages:
+                self._draw_page(canvas, page, parent_pos)
+
+    def _draw_page(self, canvas: Canvas, page: Page, parent_pos: Position):
+        page.draw(canvas, parent_pos)
+        canvas.showPage()
@@ -0,0 +1,102 @@
+import abc
+from types import GeneratorType
+from typing import Callable, Generator
+
+from reportlab.pdfgen.canvas import Canvas
+
+from reportex.core import BoxConstraints, Position, Size, Widget
+
+
+class Stepped(abc.ABC):
+    """mixin for widgets that write layout and draw as generators.
+
+    `layout_steps` yields `(child, constraints)` for every child it wants laid
+    out and gets the child's `Size` back, `draw_steps` yields
+    `(child, parent_pos)` for every child to draw. the engine keeps the
+    pending generators on a list, so nested stepped widgets don't grow the
+    python stack no matter how deep the tree is. a widget with no child to
+    wait for can return its result straight away instead of a generator,
+    which keeps leaves as cheap as a plain call.
+    """
+
+    @abc.abstractmethod
+    def layout_steps(self, constraints: BoxConstraints) -> Generator | Size:
+        ...
+
+    @abc.abstractmethod
+    def draw_steps(self, canvas: Canvas, parent_pos: Position) -> Generator | None:
+        ...
+
+    def layout(self, constraints: BoxConstraints) -> Size:
+        return run_layout(self, constraints)
+
+    def draw(self, canvas: Canvas, parent_pos: Position):
+        run_draw(self, canvas, parent_pos)
+
+
+# per method, the stepped generator function of each widget class seen so far,
+# or None when the class overrides `layout`/`draw` and must be called through it
+_steps_of: dict[str, dict[type, Callable | None]] = {"layout": {}, "draw": {}}
+
+
+def _steps_for(cls: type, method: str) -> Callable | None:
+    steps = None
+    if issubclass(cls, Stepped) and getattr(cls, method) is getattr(Stepped, method):
+        steps = getattr(cls, f"{method}_steps")
+    _steps_of[method][cls] = steps
+    return steps
+
+
+def _drive(root, method: str, args: tuple):
+    """run `root` and every stepped generator it asks for, innermost first.
+    children get `args` followed by what the generator yielded with them"""
+    if type(root) is not GeneratorType:
+        return root
+    known = _steps_of[method]
+    stack = [root]
+    push = stack.append
+    value = None
+    error = None
+    while True:
+        gen = stack[-1]
+        try:
+            if error is not None:
+                # let the parent handle the child's error as it would a raise
+                request = gen.throw(error)
+                error = None
+            else:
+                request = gen.send(value)
+        except StopIteration as stop:
+            stack.pop()
+            value = stop.value
+            if not stack:
+                return value
+            continue
+        except Exception as err:
+            stack.pop()
+            if not stack:
+                raise
+            error = err
+            continue
+
+        child, arg = request
+        cls = type(child)
+        steps = known[cls] if cls in known else _steps_for(cls, method)
+        try:
+            if steps is None:
+                value = getattr(child, method)(*args, arg)
+            else:
+                value = steps(child, *args, arg)
+                if type(value) is GeneratorType:
+                    push(value)
+                    value = None
+        except Exception as err:
+            error = err
+
+
+def run_layout(widget: Widget, constraints: BoxConstraints) -> Size:
+    return _drive(widget.layout_steps(constraints), "layout", ())
+
+
+def run_draw(widget: Widget, canvas: Canvas, parent_pos: Position):
+    _drive(widget.draw_steps(canvas, parent_pos), "draw", (canvas,))
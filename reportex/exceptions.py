@@ -6,8 +6,45 @@ class ReportexError(Exception):
 
 
 class OverFlowError(ReportexError):
-    ...
+    """a widget needs more room than its constraints give it.
+
+    `widget` is the widget that didn't fit, `required` and `available` the
+    sizes involved. `Document` adds the page and the path of widgets leading
+    down to it while the error passes through.
+    """
+
+    def __init__(
+        self, msg="", *args: object, widget=None, required=None, available=None
+    ) -> None:
+        super().__init__(msg, *args)
+        self.widget = widget
+        self.required = required
+        self.available = available
+        self.page: int | None = None
+        self.path: list[str] = []
+
+    def __str__(self):
+        return self.report()
+
+    def report(self) -> str:
+        lines = [self.msg or "insufficient space"]
+        if self.required is not None:
+            lines.append(f"required: {self.required}, available: {self.available}")
+        if self.page is not None:
+            lines.append(f"page: {self.page}")
+        if self.path:
+            lines.append("path: " + " > ".join(self.path))
+        return "\n".join(lines)
 
 
 class FontError(ReportexError):
     ...
+
+
+class RecordingError(ReportexError):
+    """a recorded drawing asked the canvas something only the real one knows,
+    like the page number"""
+
+
+class BatchError(ReportexError):
+    """records can't be rendered the way the batch asks"""
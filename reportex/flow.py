@@ -0,0 +1,230 @@
+from bisect import bisect_right
+from itertools import accumulate
+
+from reportlab.pdfgen.canvas import Canvas
+
+from reportex.core import (
+    DISC,
+    BoxConstraints,
+    LayoutField,
+    MultiPageWidget,
+    Position,
+    Size,
+    Widget,
+)
+from reportex.table import Table
+from reportex.text import Text
+
+# how close the balanced column height gets to the shortest one possible
+_BALANCE_PRECISION = 0.01
+
+
+class _TextLines(Widget):
+    """the lines [start, end) of a laid out `Text`"""
+
+    def __init__(self, text: Text, start: int, end: int):
+        super().__init__(text.width, (end - start) * text.line_height)
+        self.text = text
+        self.start = start
+        self.end = end
+        self.parent = text.parent
+
+    def draw(self, canvas: Canvas, parent_pos: Position):
+        pos = parent_pos.resolve(self.offset)
+        self.text.draw_lines(canvas, pos, self.start, self.end)
+
+
+class Flow(MultiPageWidget):
+    """pours `children` through `columns` columns per page, newspaper style,
+    and on over as many pages as they need.
+
+    texts break between their lines and tables between their rows, any other
+    child is kept whole. the columns of the last page are balanced to the
+    shortest height that still holds what is left, found by a binary search
+    on the column height.
+    """
+
+    _column_width = LayoutField()
+    _units = LayoutField()
+    _heights = LayoutField()
+    _prefix = LayoutField()
+    _pages = LayoutField()
+    _used = LayoutField()
+
+    def __init__(
+        self,
+        *,
+        children: list[Widget],
+        columns: int = 2,
+        gap: float = 12,
+        balance: bool = True,
+    ):
+        super().__init__(None, None)
+        self.children = children
+        self.columns = columns
+        self.gap = gap
+        self.balance = balance
+        for child in children:
+            child.parent = self
+
+    def layout(self, constraints: BoxConstraints) -> Size:
+        page_height = constraints.max_height
+        width = constraints.max_width
+        self._column_width = (width - self.gap * (self.columns - 1)) / self.columns
+
+        child_constraints = BoxConstraints(0, 0, self._column_width, page_height)
+        self._units: list[tuple[Widget, int]] = []
+        heights = []
+        for child in self.children:
+            for unit, height in _units(child, child_constraints):
+                self._units.append(unit)
+                heights.append(height)
+        self._heights = heights
+        # prefix[i] is the height of the units before unit i
+        self._prefix = list(accumulate(heights, initial=0))
+
+        first_avail = page_height - self.page_offset.y
+        ranges = self._paginate(first_avail, page_height)
+        self._pages = [self._place(page) for page in ranges]
+
+        self._used = [
+            max((self._prefix[e] - self._prefix[s] for s, e in page), default=0)
+            for page in ranges
+        ]
+        height = self._used[-1]
+        if len(ranges) > 1:
+            height += first_avail + (len(ranges) - 2) * page_height
+
+        size = Size(width, height)
+        self.set_size(size)
+        return size
+
+    def _fill(self, start: int, height: float) -> list[tuple[int, int]]:
+        """fill up to `columns` columns of `height` from unit `start` on, a
+        [start, end) range of units per column"""
+        prefix = self._prefix
+        count = len(self._units)
+        ranges = []
+        while start < count and len(ranges) < self.columns:
+            end = bisect_right(prefix, prefix[start] + height + DISC, start) - 1
+            # a unit taller than the column gets a column of its own
+            end = max(min(end, count), start + 1)
+            ranges.append((start, end))
+            start = end
+        return ranges
+
+    def _balanced(self, start: int, avail: float) -> list[tuple[int, int]]:
+        """the columns of the last page, as even as the units allow"""
+        count = len(self._units)
+        low = max(self._heights[start:])
+        high = avail
+        if low >= high:
+            return self._fill(start, avail)
+        while high - low > _BALANCE_PRECISION:
+            mid = (low + high) / 2
+            if self._fill(start, mid)[-1][1] >= count:
+                high = mid
+            else:
+                low = mid
+        return self._fill(start, high)
+
+    def _paginate(self, first_avail: float, page_height: float) -> list[list]:
+        count = len(self._units)
+        pages = []
+        start = 0
+        avail = first_avail
+        while True:
+            if not pages and start < count and self._heights[start] > avail + DISC:
+                # not even the first unit fits below what comes before us
+                pages.append([])
+                avail = page_height
+                continue
+            ranges = self._fill(start, avail)
+            end = ranges[-1][1] if ranges else start
+            if end >= count and self.balance and ranges:
+                ranges = self._balanced(start, avail)
+            pages.append(ranges)
+            if end >= count:
+                return pages
+            start = end
+            avail = page_height
+
+    def _place(self, ranges: list[tuple[int, int]]) -> list[Widget]:
+        """the widgets drawing one page, a piece of a text or table keeps the
+        units it got in a column together"""
+        units = self._units
+        prefix = self._prefix
+        pieces = []
+        for column, (start, end) in enumerate(ranges):
+            x = column * (self._column_width + self.gap)
+            ind = start
+            while ind < end:
+                source = units[ind][0]
+                last = ind + 1
+                while last < end and units[last][0] is source:
+                    last += 1
+                piece = self._piece(source, units[ind][1], units[last - 1][1] + 1)
+                piece.offset = Position(x, prefix[ind] - prefix[start])
+                pieces.append(piece)
+                ind = last
+        return pieces
+
+    def _piece(self, source: Widget, first: int, end: int) -> Widget:
+        if isinstance(source, Text):
+            return _TextLines(source, first, end)
+        if isinstance(source, Table):
+            return _table_part(source, first, end, self._column_width)
+        return source
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pages)
+
+    def page_used(self, page: int) -> float:
+        return self._used[page]
+
+    def draw(self, canvas: Canvas, parent_pos: Position):
+        pos = parent_pos.resolve(self.offset)
+        for page in range(self.page_count):
+            if page:
+                canvas.showPage()
+                pos = self.parent.page_broken()
+            self.draw_page(canvas, pos, page)
+
+    def draw_page(self, canvas: Canvas, pos: Position, page: int):
+        for piece in self._pages[page]:
+            piece.draw(canvas, pos)
+
+
+def _units(child: Widget, constraints: BoxConstraints):
+    """the pieces a child can be broken into, as ((child, index), height)"""
+    if isinstance(child, Text):
+        # the lines wrap the same however much of them the page can show
+        child.layout(constraints)
+        for line in range(child.no_lines):
+            yield (child, line), child.line_height
+    elif isinstance(child, Table):
+        child._set_column_widths(constraints.max_width)
+        for ind, row in enumerate(child.rows):
+            yield (child, ind), row.layout(constraints).height + row.margin
+    else:
+        yield (child, 0), child.layout(constraints).height
+
+
+def _table_part(table: Table, start: int, end: int, width: float) -> Table:
+    """a table of the already laid out rows [start, end) of `table`"""
+    rows = table.rows[start:end]
+    part = Table(
+        columns=table.columns,
+        rows=rows,
+        border=table.border,
+        batch_grid=table.batch_grid,
+    )
+    part.parent = table.parent
+    y = 0
+    for row in rows:
+        row.offset = Position(0, y)
+        y += row.height + row.margin
+    part.allowed_rows = rows
+    part.set_size(Size(width, y))
+    return part
@@ -0,0 +1,114 @@
+from reportlab.pdfgen.canvas import Canvas
+
+from reportex.core import BorderSide, Color, DISC
+
+
+class GridBatch:
+    """collects the backgrounds and rules of a table and paints them at once.
+
+    backgrounds of neighbouring cells with the same color become one
+    rectangle and the touching collinear segments of a rule become one
+    stroked path. each rule is stroked on its own and in the order the cells
+    first draw it, so parallel rules side by side and crossing rules look as
+    they do drawn cell by cell. colors and sides are interned, so they are
+    grouped by identity.
+    """
+
+    def __init__(self):
+        self._rows: list[list[list]] = []
+        # (side, vertical, x or y) -> [[start, end], ...]
+        self._lines: dict[tuple, list[list[float]]] = {}
+
+    def begin_row(self):
+        self._rows.append([])
+
+    def add_fill(self, color: Color, x: float, y: float, width: float, height: float):
+        """fill of the box whose top left corner is (x, y), in pdf coordinates"""
+        key = color
+        if not self._rows:
+            self.begin_row()
+        row = self._rows[-1]
+        if row:
+            last = row[-1]
+            if (
+                last[0] == key
+                and abs(last[1] + last[3] - x) < DISC
+                and last[2] == y
+                and last[4] == height
+            ):
+                last[3] = x + width - last[1]
+                return
+        row.append([key, x, y, width, height])
+
+    def add_line(self, side: BorderSide, x1: float, y1: float, x2: float, y2: float):
+        if side is None or side.width <= 0:
+            return
+        if y1 == y2:
+            self._lines.setdefault((side, False, y1), []).append(
+                [min(x1, x2), max(x1, x2)]
+            )
+        elif x1 == x2:
+            self._lines.setdefault((side, True, x1), []).append(
+                [min(y1, y2), max(y1, y2)]
+            )
+
+    def _merged_fills(self) -> list[list]:
+        done = []
+        # open rectangles keyed by color and horizontal extent, they grow
+        # downwards for as long as the next row continues them
+        open_rects: dict[tuple, list] = {}
+        for row in self._rows:
+            next_open = {}
+            for rect in row:
+                key, x, y, w, h = rect
+                ident = (key, round(x / DISC), round(w / DISC))
+                above = open_rects.pop(ident, None)
+                if above is not None and abs(above[2] - above[4] - y) < DISC:
+                    above[4] += h
+                    next_open[ident] = above
+                else:
+                    if above is not None:
+                        done.append(above)
+                    next_open[ident] = rect
+            done.extend(open_rects.values())
+            open_rects = next_open
+        done.extend(open_rects.values())
+        return done
+
+    @staticmethod
+    def _merge_segments(segments: list[list[float]]) -> list[list[float]]:
+        segments.sort()
+        merged = [segments[0]]
+        for start, end in segments[1:]:
+            last = merged[-1]
+            if start <= last[1] + DISC:
+                last[1] = max(last[1], end)
+            else:
+                merged.append([start, end])
+        return merged
+
+    def _merged_lines(self) -> list[tuple[BorderSide, list[tuple]]]:
+        paths = []
+        for (side, vertical, at), segments in self._lines.items():
+            merged = self._merge_segments(segments)
+            if vertical:
+                paths.append((side, [(at, y2, at, y1) for y1, y2 in merged]))
+            else:
+                paths.append((side, [(x1, at, x2, at) for x1, x2 in merged]))
+        return paths
+
+    def draw(self, canvas: Canvas):
+        canvas.saveState()
+        for color, x, y, w, h in self._merged_fills():
+            canvas.setFillColorRGB(*color.rgb, color.alpha)
+            canvas.rect(x, y - h, w, h, fill=True, stroke=False)
+
+        for side, segments in self._merged_lines():
+            canvas.setLineWidth(side.width)
+            canvas.setStrokeColorRGB(*side.color.rgb, side.color.alpha)
+            path = canvas.beginPath()
+            for x1, y1, x2, y2 in segments:
+                path.moveTo(x1, y1)
+                path.lineTo(x2, y2)
+            canvas.drawPath(path, stroke=1, fill=0)
+        canvas.restoreState()
@@ -1,12 +1,11 @@
-import io
-import json
-import uuid
+import asyncio
 import requests
 from PIL import Image as imagemod
 from PIL.Image import Image as PilImage
 from reportlab.pdfgen.canvas import Canvas
 
-from reportex.core import Widget, Size, Position, BoxConstraints, Border, BASE_DIR
+from reportex.core import Widget, Size, Position, BoxConstraints, Border
+from reportex.image_cache import CACHE_DIR, ImageCache
 
 
 class Image(Widget):
@@ -41,31 +40,43 @@ class Image(Widget):
         height: float = None,
         border: Border = None
     ) -> "Image":
-        img = None
-        with open(BASE_DIR / "reportex" / "cache" / "network_images.json") as f:
-            cache = json.load(f)
-
-        if cache.get(url):
-            img = imagemod.open(BASE_DIR / "reportex" / "cache" / cache[url])
-
-        else:
+        img = cls._from_cache(url)
+        if img is None:
             resp = requests.get(url)
-            if resp.status_code == 200:
-                content = io.BytesIO(resp.content)
-                img = imagemod.open(content)
-                name = uuid.uuid4().hex + "." + img.format
-                img.save(BASE_DIR / "reportex" / "cache" / name)
-                with open(
-                    BASE_DIR / "reportex" / "cache" / "network_images.json", "w"
-                ) as f:
-                    cache[url] = name
-                    json.dump(cache, f)
-            else:
-                print("failed to get image from ", url)
-            img = imagemod.open(BASE_DIR / "reportex" / "cache" / cache[url])
+            img = cls._cache_response(url, resp)
 
         return cls(image=img, width=width, height=height)
 
+    @classmethod
+    async def afrom_network(
+        cls,
+        *,
+        url: str,
+        width: float = None,
+        height: float = None,
+        border: Border = None
+    ) -> "Image":
+        """like `from_network` but nothing of it blocks the event loop, the
+        cache lookup, download, decoding and cache writes run in a thread"""
+        return await asyncio.to_thread(
+            cls.from_network, url=url, width=width, height=height, border=border
+        )
+
+    @classmethod
+    def _from_cache(cls, url: str) -> PilImage | None:
+        path = ImageCache(CACHE_DIR).lookup(url)
+        if path is not None:
+            return imagemod.open(path)
+        return None
+
+    @classmethod
+    def _cache_response(cls, url: str, resp: requests.Response) -> PilImage:
+        cache = ImageCache(CACHE_DIR)
+        if resp.status_code == 200:
+            return imagemod.open(cache.store(url, resp.content))
+        print("failed to get image from ", url)
+        return imagemod.open(CACHE_DIR / cache.index()[url])
+
     @classmethod
     def from_memory(
         cls,
@@ -77,6 +88,10 @@ class Image(Widget):
     ) -> "Image":
         ...
 
+    def intrinsic_widths(self) -> tuple[float, float]:
+        width = self.width or 0
+        return width, width
+
     def get_borders_size(self):
         w = h = 0
         if not self.border:
@@ -141,20 +156,17 @@ class Image(Widget):
         if self.border.left:
             side = self.border.left
             canvas.setLineWidth(side.width)
-            color = side.color.normalize()
-            canvas.setStrokeColorRGB(color.r, color.g, color.b, color.a)
+            canvas.setStrokeColorRGB(*side.color.rgb, side.color.alpha)
             canvas.line(pos.x + 0.5, pos.y, pos.x + 0.5, pos.y - self.height)
         if self.border.top:
             side = self.border.top
             canvas.setLineWidth(side.width)
-            color = side.color.normalize()
-            canvas.setStrokeColorRGB(color.r, color.g, color.b, color.a)
+            canvas.setStrokeColorRGB(*side.color.rgb, side.color.alpha)
             canvas.line(pos.x, pos.y - 0.5, pos.x + self.width, pos.y - 0.5)
         if self.border.right:
             side = self.border.right
             canvas.setLineWidth(side.width)
-            color = side.color.normalize()
-            canvas.setStrokeColorRGB(color.r, color.g, color.b, color.a)
+            canvas.setStrokeColorRGB(*side.color.rgb, side.color.alpha)
             canvas.line(
                 pos.x + self.width - 0.5,
                 pos.y,
@@ -164,8 +176,7 @@ class Image(Widget):
         if self.border.bottom:
             side = self.border.bottom
             canvas.setLineWidth(side.width)
-            color = side.color.normalize()
-            canvas.setStrokeColorRGB(color.r, color.g, color.b, color.a)
+            canvas.setStrokeColorRGB(*side.color.rgb, side.color.alpha)
             canvas.line(
                 pos.x,
                 pos.y - self.height + 0.5,
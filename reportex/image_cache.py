@@ -0,0 +1,238 @@
+import io
+import os
+import json
+import time
+import uuid
+import atexit
+import pathlib
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # no advisory locks on windows, processes may race there
+    fcntl = None
+
+import requests
+from PIL import Image as imagemod
+
+from reportex.core import BASE_DIR, _write_json
+
+CACHE_DIR = BASE_DIR / "reportex" / "cache"
+INDEX = "network_images.json"
+STATS = "stats.json"
+LOCK = ".lock"
+# a hit touches its file at most this often, in seconds
+TOUCH_EVERY = 60
+
+_file_lock = threading.Lock()
+_count_lock = threading.Lock()
+# lookups counted in this process and not written to `stats.json` yet
+_pending: dict[pathlib.Path, Counter] = {}
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    path: pathlib.Path
+    size: int
+    # when the entry was last stored or read, lookups touch the file
+    last_used: float
+
+
+def _read_json(path: pathlib.Path) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+@contextmanager
+def _locked(directory: pathlib.Path):
+    """hold the cache directory against other threads and processes while
+    a file in it is read, changed and written back"""
+    with _file_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(directory / LOCK, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _flush_all():
+    for directory in list(_pending):
+        ImageCache(directory).flush()
+
+
+atexit.register(_flush_all)
+
+
+class ImageCache:
+    """the downloaded network images, `network_images.json` maps each url to
+    its file in `directory`.
+
+    lookups are counted for the hit rate and touch the file they hit, so the
+    file times order the entries for least recently used eviction. both are
+    best effort: the counts are kept in memory and written by `flush`, at
+    exit or when the stats are read, and a read only cache still serves hits.
+    """
+
+    def __init__(self, directory: pathlib.Path = CACHE_DIR):
+        self.directory = directory
+
+    def index(self) -> dict[str, str]:
+        return _read_json(self.directory / INDEX)
+
+    def _count(self, key: str):
+        with _count_lock:
+            _pending.setdefault(self.directory, Counter())[key] += 1
+
+    def flush(self):
+        """add the counts of this process to `stats.json`, they are dropped
+        if it can't be written"""
+        with _count_lock:
+            counts = _pending.pop(self.directory, None)
+        if not counts:
+            return
+        try:
+            with _locked(self.directory):
+                stats = _read_json(self.directory / STATS)
+                for key, count in counts.items():
+                    stats[key] = stats.get(key, 0) + count
+                _write_json(self.directory / STATS, stats)
+        except OSError:
+            pass
+
+    def lookup(self, url: str) -> pathlib.Path | None:
+        name = self.index().get(url)
+        path = self.directory / name if name else None
+        try:
+            mtime = path.stat().st_mtime if path is not None else None
+        except OSError:
+            mtime = None
+        if mtime is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        if time.time() - mtime > TOUCH_EVERY:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return path
+
+    def _save(self, content: bytes) -> str:
+        img = imagemod.open(io.BytesIO(content))
+        name = uuid.uuid4().hex + "." + img.format
+        img.save(self.directory / name)
+        return name
+
+    def store(self, url: str, content: bytes) -> pathlib.Path:
+        name = self._save(content)
+        self._update({url: name})
+        return self.directory / name
+
+    def _update(self, added: dict[str, str], removed=()):
+        # merged into the index as it is now, not as it was read before
+        with _locked(self.directory):
+            index = self.index()
+            index.update(added)
+            for url in removed:
+                index.pop(url, None)
+            _write_json(self.directory / INDEX, index)
+
+    def entries(self) -> list[CacheEntry]:
+        entries = []
+        for url, name in self.index().items():
+            path = self.directory / name
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append(CacheEntry(url, path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def stats(self) -> dict:
+        self.flush()
+        entries = self.entries()
+        counts = _read_json(self.directory / STATS)
+        hits = counts.get("hits", 0)
+        lookups = hits + counts.get("misses", 0)
+        return {
+            "entries": len(entries),
+            "bytes": sum(entry.size for entry in entries),
+            "hits": hits,
+            "lookups": lookups,
+            "hit rate": hits / lookups if lookups else 0,
+        }
+
+    def prune(
+        self, max_size: int | None = None, max_age: float | None = None
+    ) -> list[CacheEntry]:
+        """evict entries unused for longer than `max_age` seconds, then the
+        least recently used ones until at most `max_size` bytes are left"""
+        entries = sorted(self.entries(), key=lambda entry: entry.last_used)
+        evicted = []
+        if max_age is not None:
+            cutoff = time.time() - max_age
+            while entries and entries[0].last_used < cutoff:
+                evicted.append(entries.pop(0))
+        if max_size is not None:
+            total = sum(entry.size for entry in entries)
+            while entries and total > max_size:
+                entry = entries.pop(0)
+                total -= entry.size
+                evicted.append(entry)
+
+        live = {entry.url for entry in self.entries()}
+        gone = set(self.index()) - live
+        for entry in evicted:
+            entry.path.unlink(missing_ok=True)
+        self._update({}, [entry.url for entry in evicted] + list(gone))
+        return evicted
+
+    def warm(self, urls: list[str], workers: int = 8) -> dict[str, int]:
+        """download the urls not cached yet in parallel, the index is
+        written once at the end"""
+        index = self.index()
+        todo = [
+            url
+            for url in dict.fromkeys(urls)
+            if not (url in index and (self.directory / index[url]).is_file())
+        ]
+
+        def fetch(url: str) -> str | None:
+            try:
+                resp = requests.get(url, timeout=30)
+                if resp.status_code != 200:
+                    return None
+                return self._save(resp.content)
+            except (requests.RequestException, OSError):
+                return None
+
+        with ThreadPoolExecutor(workers) as pool:
+            names = list(pool.map(fetch, todo))
+        added = {url: name for url, name in zip(todo, names) if name is not None}
+        self._update(added)
+        return {
+            "cached": len(urls) - len(todo),
+            "fetched": len(added),
+            "failed": len(todo) - len(added),
+        }
+
+    def clear(self):
+        with _count_lock:
+            _pending.pop(self.directory, None)
+        with _locked(self.directory):
+            for name in os.listdir(self.directory):
+                if name != LOCK:
+                    os.remove(self.directory / name)
+            _write_json(self.directory / INDEX, {})
@@ -0,0 +1,233 @@
+import re
+import enum
+import types
+import hashlib
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from reportlab.pdfgen.canvas import Canvas
+
+from reportex.core import (
+    BoxConstraints,
+    Interned,
+    LayoutField,
+    Position,
+    Size,
+    Widget,
+)
+from reportex.document import Document, Page
+
+
+@lru_cache(maxsize=None)
+def _layout_attrs(cls: type) -> frozenset[str]:
+    """attributes written by layout/draw rather than by the user, they are left
+    out of fingerprints so a fresh tree and an already rendered one can compare
+    equal"""
+    return LayoutField.derived(cls)
+
+
+def _cell_contents(cell) -> object:
+    try:
+        return cell.cell_contents
+    except ValueError:
+        # a closure variable not assigned yet
+        return None
+
+
+_FONT_REF = re.compile(r"/F\d+(?= [\d.]+ Tf)")
+# xobjects, extgstates and ttf subsets are registered per pdf document, a
+# stream that refers to them can't be copied into another document
+_DOC_RESOURCE = re.compile(r"/\S+ Do\b|/\S+ gs\b|/F\d+\+\d+")
+
+
+def fingerprint(widget: Widget) -> str:
+    """hash of a widget subtree and the data it holds"""
+    digest = hashlib.blake2b(digest_size=16)
+    seen: dict[int, int] = {}
+    stack = [widget]
+    while stack:
+        obj = stack.pop()
+        if obj is None or isinstance(obj, (bool, int, float, str, bytes)):
+            digest.update(repr(obj).encode())
+            continue
+        if isinstance(obj, enum.Enum):
+            digest.update(f"{type(obj).__name__}.{obj.name}".encode())
+            continue
+        if isinstance(obj, (list, tuple)):
+            digest.update(f"[{len(obj)}".encode())
+            stack.extend(reversed(obj))
+            continue
+        if isinstance(obj, (set, frozenset)):
+            digest.update(f"{{{len(obj)}".encode())
+            stack.extend(sorted(obj, key=repr))
+            continue
+        if isinstance(obj, dict):
+            digest.update(f"{{{len(obj)}".encode())
+            for key in sorted(obj, key=repr, reverse=True):
+                stack.append(obj[key])
+                stack.append(key)
+            continue
+        if isinstance(obj, Interned):
+            # equal style values are one object, their key says it all
+            digest.update(type(obj).__qualname__.encode())
+            stack.append(obj._key)
+            continue
+        if id(obj) in seen:
+            digest.update(f"@{seen[id(obj)]}".encode())
+            continue
+        seen[id(obj)] = len(seen)
+
+        digest.update(type(obj).__qualname__.encode())
+        if isinstance(obj, types.FunctionType):
+            # functions of one definition differ by what they close over
+            digest.update(obj.__qualname__.encode())
+            cells = tuple(_cell_contents(cell) for cell in obj.__closure__ or ())
+            stack.append((obj.__code__, obj.__defaults__, obj.__kwdefaults__, cells))
+        elif isinstance(obj, types.MethodType):
+            stack.append((obj.__func__, obj.__self__))
+        elif isinstance(obj, types.CodeType):
+            digest.update(obj.co_code)
+            stack.append((obj.co_consts, obj.co_names))
+        elif isinstance(obj, (type, types.BuiltinFunctionType)):
+            digest.update(f"{obj.__module__}.{obj.__qualname__}".encode())
+        elif hasattr(obj, "filename") and hasattr(obj, "size"):
+            # PIL images, identified by their source rather than their pixels
+            stack.append((obj.filename, tuple(obj.size), obj.mode))
+        else:
+            stack.append(_state(obj))
+    return digest.hexdigest()
+
+
+def _state(obj) -> dict:
+    skipped = _layout_attrs(type(obj))
+    state = {}
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            if name not in skipped and hasattr(obj, name):
+                state[name] = getattr(obj, name)
+    for name, value in getattr(obj, "__dict__", {}).items():
+        if name not in skipped:
+            state[name] = value
+    return state
+
+
+@dataclass
+class RenderedPage:
+    fingerprint: str
+    first_page: int
+    streams: list[list[str]] = field(default_factory=list)
+    fonts: dict[str, str] = field(default_factory=dict)
+    # the page once laid out, layout writes sizes and shrunk fonts over the
+    # values the widgets were built with
+    laid_out: str = ""
+
+    def matches(self, fp: str) -> bool:
+        """whether a page of fingerprint `fp` is this one, rebuilt the same
+        or left as it was rendered"""
+        return fp in (self.fingerprint, self.laid_out)
+
+    @property
+    def replayable(self) -> bool:
+        return not any(_DOC_RESOURCE.search(" ".join(s)) for s in self.streams)
+
+
+class IncrementalRenderer:
+    """renders documents, reusing the content streams of unchanged pages.
+
+    the renderer remembers what each `Page` of the previously rendered document
+    produced. on the next `render` a page whose fingerprint (and first pdf page
+    number) is unchanged is copied from the stored streams, only the others go
+    through layout and draw again. the fingerprint may be that of the page as
+    built or as last rendered, so the same tree rendered again is unchanged.
+    """
+
+    def __init__(self):
+        self._rendered: list[RenderedPage] = []
+        self.redrawn: list[int] = []
+
+    def render(self, document: Document):
+        canvas = document.make_canvas()
+        constraints = BoxConstraints(
+            0, 0, document.page_size[0], document.page_size[1]
+        )
+        pos = Position(0, document.page_size[1])
+        self.redrawn = []
+        document._new_tree()
+        document.begin_references()
+        with document._active():
+            document.set_size(Size(constraints.max_width, constraints.max_height))
+            rendered = self._render_pages(document, canvas, constraints, pos)
+            document.fill_references(canvas)
+        canvas.save()
+        self._rendered = rendered
+
+    def _render_pages(
+        self,
+        document: Document,
+        canvas: Canvas,
+        constraints: BoxConstraints,
+        pos: Position,
+    ) -> list[RenderedPage]:
+        rendered = []
+        for ind, page in enumerate(document.pages):
+            fp = fingerprint(page)
+            first_page = canvas.getPageNumber()
+            previous = self._rendered[ind] if ind < len(self._rendered) else None
+            if (
+                previous is not None
+                and previous.matches(fp)
+                and previous.first_page == first_page
+                and previous.replayable
+            ):
+                self._replay(canvas, previous)
+                rendered.append(previous)
+                continue
+
+            document._layout_page(page, constraints)
+            result = self._record(canvas, document, page, pos, fp)
+            result.laid_out = fingerprint(page)
+            rendered.append(result)
+            self.redrawn.append(ind)
+        return rendered
+
+    def invalidate(self):
+        self._rendered = []
+
+    def _record(
+        self, canvas: Canvas, document: Document, page: Page, pos: Position, fp: str
+    ) -> RenderedPage:
+        result = RenderedPage(fp, canvas.getPageNumber())
+        show_page = canvas.showPage
+
+        def capture():
+            result.streams.append(list(canvas._code))
+            show_page()
+
+        canvas.showPage = capture
+        try:
+            document._draw_page(canvas, page, pos)
+        finally:
+            del canvas.showPage
+
+        internal = {v: k for k, v in canvas._doc.fontMapping.items()}
+        for stream in result.streams:
+            for ref in _FONT_REF.findall(" ".join(stream)):
+                if ref in internal:
+                    result.fonts[ref] = internal[ref]
+        return result
+
+    def _replay(self, canvas: Canvas, rendered: RenderedPage):
+        rename = {}
+        for ref, psname in rendered.fonts.items():
+            new_ref = canvas._doc.getInternalFontName(psname)
+            if new_ref != ref:
+                rename[ref] = new_ref
+
+        for stream in rendered.streams:
+            if rename:
+                stream = [
+                    _FONT_REF.sub(lambda m: rename.get(m.group(0), m.group(0)), s)
+                    for s in stream
+                ]
+            canvas._code.extend(stream)
+            canvas.showPage()
@@ -1,25 +1,31 @@
 from reportlab.pdfgen.canvas import Canvas
 from reportex.core import (
     BoxConstraints,
+    LayoutField,
     Position,
     MultiChildrenWidget,
     Size,
     Widget,
-    MultiPageWidget,
-    DocInfo,
 )
-from reportex.exceptions import OverFlowError
+from reportex.pagination import PageBreak, PagePlan, paginate
 
 
-class PageBreak(Widget):
-    def __init__(self):
-        super().__init__(None, None)
+class MultiPage(MultiChildrenWidget):
+    """stacks its children on as many pages as they need.
 
+    layout works out a `PagePlan` of what goes on which page in one pass,
+    `draw` replays it page by page. each page holds `constraints.max_height`
+    of content, the content of a continued page starts at the margin of the
+    enclosing `Page`. without one the page is that content with `margin`
+    around it.
+    """
+
+    plan = LayoutField()
 
-class MultiPage(MultiChildrenWidget):
     def __init__(self, children: list[Widget], margin: int = 5):
         super().__init__(children, None, None)
         self.margin = margin
+        self.plan: PagePlan | None = None
 
     @property
     def client_height(self):
@@ -33,55 +39,42 @@ class MultiPage(MultiChildrenWidget):
     def client_origin(self):
         return super().client_origin
 
+    @property
+    def page_count(self) -> int:
+        return len(self.plan)
+
+    def _page_frame(self, constraints: BoxConstraints) -> tuple[float, float]:
+        """height and margin of the pdf pages the content continues on"""
+        from reportex.document import Page
+
+        widget = self.parent
+        while widget is not None and not isinstance(widget, Page):
+            widget = widget.parent
+        if widget is None:
+            return constraints.max_height + 2 * self.margin, self.margin
+        return widget.height, widget.margin
+
     def layout(self, constraints: BoxConstraints) -> Size:
-        page_height = DocInfo.page.height
-
-        height = 0
-        remheight = page_height
-        y = 0
-        for child in self.children:
-            if isinstance(child, MultiPageWidget):
-                child.page_offset = Position(0, y)
-                child_size = child.layout(constraints)
-                child_span_pages = (child_size.height + y) // page_height
-
-                child.offset = Position(0, y)
-                if child_span_pages > 0:
-                    y_ = (
-                        child_size.height
-                        - (page_height - y)
-                        - (child_span_pages - 1) * page_height
-                    )
-                    remheight = page_height - y_
-                else:
-                    y_ = y + child_size.height
-                    remheight -= y_
-
-                height += child_size.height
-                y = y_
-
-            else:
-                if remheight == 0:
-                    raise OverFlowError("not sufficient space")
-                child_size = child.layout(
-                    BoxConstraints(0, 0, constraints.max_width, remheight)
-                )
-
-                child.offset = Position(0, y)
-                y += child_size.height
-                remheight += child_size.height
-                height += child_size.height
-
-        size = Size(constraints.max_width, height)
+        page_height, margin = self._page_frame(constraints)
+        self.plan = paginate(self.children, constraints, page_height, margin)
+        size = Size(constraints.max_width, self.plan.height)
         self.set_size(size)
         return size
 
     def draw(self, canvas: Canvas, parent_pos: Position):
-        for child in self.children:
-            pos = parent_pos.resolve(self.offset)
-            child.draw(canvas, pos)
+        for page in range(self.page_count):
+            if page:
+                canvas.showPage()
+            self.draw_page(canvas, parent_pos, page)
+
+    def draw_page(self, canvas: Canvas, parent_pos: Position, page: int):
+        """draw one page of the plan, pages don't depend on each other"""
+        origin = parent_pos.resolve(self.offset) if page == 0 else self.page_origin()
+        self.plan.draw_page(canvas, page, origin)
+
+    def page_origin(self) -> Position:
+        """top left of the content of a continued page"""
+        return self.plan.origin()
 
     def page_broken(self):
-        position = Position(0, DocInfo.page.height)
-        self.offset = Position(self.margin, self.margin)
-        return position.resolve(self.offset)
+        return self.page_origin()
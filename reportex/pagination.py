@@ -0,0 +1,134 @@
+from dataclasses import dataclass
+
+from reportlab.pdfgen.canvas import Canvas
+
+from reportex.core import (
+    DISC,
+    BoxConstraints,
+    MultiPageWidget,
+    Position,
+    Size,
+    Widget,
+)
+from reportex.exceptions import OverFlowError
+
+
+class PageBreak(Widget):
+    """ends the page of a `MultiPage`, what follows starts on the next"""
+
+    def __init__(self):
+        super().__init__(None, None)
+
+
+@dataclass(slots=True)
+class Placement:
+    """a widget, or one page of a `MultiPageWidget`, put on a page. `offset`
+    is from the top left of the page's content box"""
+
+    widget: Widget
+    offset: Position
+    # the page of a multi page widget, None for a widget drawn whole
+    slice: int | None = None
+
+
+class PagePlan:
+    """what goes on which page, worked out once by `paginate`.
+
+    each page can be drawn on its own from the plan, so pages can be drawn in
+    any order and counted without drawing any of them. the content of a
+    continued page starts `margin` from the top left of a pdf page
+    `page_height` tall.
+    """
+
+    def __init__(self, capacity: float, page_height: float, margin: float):
+        self.capacity = capacity
+        self.page_height = page_height
+        self.margin = margin
+        self.pages: list[list[Placement]] = [[]]
+        # height used on the last page
+        self.used = 0
+
+    def __len__(self):
+        return len(self.pages)
+
+    @property
+    def height(self) -> float:
+        return (len(self.pages) - 1) * self.capacity + self.used
+
+    def origin(self) -> Position:
+        """top left of the content of a continued page"""
+        return Position(0, self.page_height).resolve(
+            Position(self.margin, self.margin)
+        )
+
+    def new_page(self):
+        self.pages.append([])
+        self.used = 0
+
+    def place(self, widget: Widget, offset: Position, slice: int | None = None):
+        self.pages[-1].append(Placement(widget, offset, slice))
+
+    def draw_page(self, canvas: Canvas, page: int, origin: Position):
+        """draw page `page` with the content box's top left at `origin`"""
+        for placement in self.pages[page]:
+            if placement.slice is None:
+                placement.widget.draw(canvas, origin)
+            else:
+                pos = origin.resolve(placement.offset)
+                placement.widget.draw_page(canvas, pos, placement.slice)
+
+
+def _fit(child: Widget, width: float, room: float) -> Size | None:
+    """the size of `child` laid out in what is left of a page, None when it
+    overflows it"""
+    if room <= DISC:
+        return None
+    try:
+        size = child.layout(BoxConstraints(0, 0, width, room))
+    except OverFlowError:
+        return None
+    return size if size.height <= room + DISC else None
+
+
+def paginate(
+    children: list[Widget],
+    constraints: BoxConstraints,
+    page_height: float,
+    margin: float,
+) -> PagePlan:
+    """lay `children` out one below the other on pages of
+    `constraints.max_height`, in a single pass.
+
+    a child is laid out in what is left of the page and starts the next one
+    when it overflows that, multi page widgets continue on as many pages as
+    they need and a `PageBreak` ends the page.
+    """
+    width = constraints.max_width
+    capacity = constraints.max_height
+    plan = PagePlan(capacity, page_height, margin)
+    for child in children:
+        if isinstance(child, PageBreak):
+            plan.new_page()
+            continue
+
+        if isinstance(child, MultiPageWidget):
+            child.page_offset = Position(0, plan.used)
+            child.offset = Position(0, plan.used)
+            child.layout(BoxConstraints(0, 0, width, capacity))
+            last = child.page_count - 1
+            for page in range(child.page_count):
+                if page:
+                    plan.new_page()
+                plan.place(child, Position(0, plan.used), page)
+            plan.used += child.page_used(last)
+            continue
+
+        size = _fit(child, width, capacity - plan.used) if plan.used else None
+        if size is None:
+            if plan.used:
+                plan.new_page()
+            size = child.layout(BoxConstraints(0, 0, width, capacity))
+        child.offset = Position(0, plan.used)
+        plan.place(child, child.offset)
+        plan.used += size.height
+    return plan
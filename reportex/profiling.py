@@ -0,0 +1,192 @@
+import runpy
+import time
+from types import GeneratorType
+
+from reportex.core import Widget
+from reportex.document import Document
+
+PHASES = {
+    "layout": "layout",
+    "layout_steps": "layout",
+    "draw": "draw",
+    "draw_steps": "draw",
+    "draw_page": "draw",
+    "paint": "draw",
+}
+
+
+def _widget_classes():
+    found = []
+    pending = [Widget]
+    while pending:
+        cls = pending.pop()
+        for sub in cls.__subclasses__():
+            if sub not in found:
+                found.append(sub)
+                pending.append(sub)
+    return found
+
+
+def _timed_steps(profile: "WidgetProfile", key: tuple, widget_id: int, steps):
+    """a stepped widget's generator, timed one step at a time. what the
+    engine runs between the steps belongs to the children"""
+    value = None
+    error = None
+    while True:
+        profile._active.add(widget_id)
+        start = profile._enter()
+        try:
+            if error is not None:
+                request = steps.throw(error)
+            else:
+                request = steps.send(value)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            profile._exit(key, start)
+            profile._active.discard(widget_id)
+        try:
+            value = yield request
+            error = None
+        except Exception as err:
+            error = err
+
+
+class WidgetProfile:
+    """time spent in layout and draw per widget class.
+
+    while the profile is entered the `layout` and `draw` of every widget
+    class is timed, a widget's time is its own, without its children's.
+    only the outermost timed call of a widget counts, a `super().draw()` or
+    the `paint` of a `draw` is part of it. widget classes defined later are
+    picked up when a document is laid out.
+    """
+
+    def __init__(self):
+        # (class name, phase) -> [calls, seconds]
+        self.times: dict[tuple[str, str], list] = {}
+        self._children_time: list[float] = []
+        # ids of the widgets inside a timed call right now
+        self._active: set[int] = set()
+        self._patched: list[tuple[type, str, object]] = []
+        self._seen: set[type] = set()
+
+    def __enter__(self) -> "WidgetProfile":
+        self._patch(Document, "layout", self._rescanning(Document.layout))
+        self._patch_widgets()
+        return self
+
+    def __exit__(self, *exc):
+        for cls, name, original in reversed(self._patched):
+            setattr(cls, name, original)
+        self._patched = []
+        self._seen = set()
+
+    def _patch(self, cls: type, name: str, wrapper):
+        self._patched.append((cls, name, cls.__dict__[name]))
+        setattr(cls, name, wrapper)
+
+    def _patch_widgets(self):
+        for cls in _widget_classes():
+            if cls in self._seen or issubclass(cls, Document):
+                continue
+            self._seen.add(cls)
+            for name, phase in PHASES.items():
+                if name not in cls.__dict__:
+                    continue
+                method = cls.__dict__[name]
+                if name.endswith("_steps"):
+                    self._patch(cls, name, self._stepwise(method, phase))
+                else:
+                    self._patch(cls, name, self._timed(method, phase))
+
+    def _rescanning(self, layout):
+        profile = self
+
+        def wrapper(document, *args, **kwargs):
+            profile._patch_widgets()
+            return layout(document, *args, **kwargs)
+
+        return wrapper
+
+    def _count(self, key: tuple):
+        self.times.setdefault(key, [0, 0.0])[0] += 1
+
+    def _enter(self) -> float:
+        self._children_time.append(0.0)
+        return time.perf_counter()
+
+    def _exit(self, key: tuple, start: float):
+        elapsed = time.perf_counter() - start
+        children = self._children_time.pop()
+        self.times.setdefault(key, [0, 0.0])[1] += elapsed - children
+        if self._children_time:
+            self._children_time[-1] += elapsed
+
+    def _timed(self, method, phase: str):
+        profile = self
+
+        def wrapper(widget, *args, **kwargs):
+            widget_id = id(widget)
+            if widget_id in profile._active:
+                return method(widget, *args, **kwargs)
+            key = (type(widget).__name__, phase)
+            profile._count(key)
+            profile._active.add(widget_id)
+            start = profile._enter()
+            try:
+                return method(widget, *args, **kwargs)
+            finally:
+                profile._exit(key, start)
+                profile._active.discard(widget_id)
+
+        return wrapper
+
+    def _stepwise(self, method, phase: str):
+        profile = self
+
+        def wrapper(widget, *args, **kwargs):
+            widget_id = id(widget)
+            if widget_id in profile._active:
+                return method(widget, *args, **kwargs)
+            key = (type(widget).__name__, phase)
+            profile._count(key)
+            profile._active.add(widget_id)
+            start = profile._enter()
+            try:
+                steps = method(widget, *args, **kwargs)
+            finally:
+                profile._exit(key, start)
+                profile._active.discard(widget_id)
+            if type(steps) is GeneratorType:
+                return _timed_steps(profile, key, widget_id, steps)
+            return steps
+
+        return wrapper
+
+    def rows(self) -> list[dict]:
+        """a row per widget class, the most expensive first"""
+        by_class: dict[str, dict] = {}
+        for (name, phase), (calls, secs) in self.times.items():
+            row = by_class.setdefault(
+                name,
+                {
+                    "widget": name,
+                    "layout calls": 0,
+                    "layout s": 0.0,
+                    "draw calls": 0,
+                    "draw s": 0.0,
+                },
+            )
+            row[f"{phase} calls"] += calls
+            row[f"{phase} s"] += secs
+        rows = list(by_class.values())
+        rows.sort(key=lambda row: row["layout s"] + row["draw s"], reverse=True)
+        return rows
+
+
+def profile_script(path: str) -> WidgetProfile:
+    """run a script that builds and renders documents, under a profile"""
+    with WidgetProfile() as profile:
+        runpy.run_path(path, run_name="__main__")
+    return profile
@@ -0,0 +1,168 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from string import Formatter
+
+from reportlab.pdfgen.canvas import Canvas
+
+from reportex.core import BoxConstraints, Position, Size, Widget
+from reportex.text import CtxFont
+
+PAGES = "pages"
+
+
+def page_key(anchor: str) -> str:
+    return f"page:{anchor}"
+
+
+class References:
+    """values that are drawn before they are known, like the page count or
+    the page of an anchor further down.
+
+    widgets draw a reference through a form xobject and `fill` defines the
+    forms once the document is drawn, so every page shares the one copy of a
+    value and nothing has to be drawn twice.
+    """
+
+    def __init__(self):
+        self.values: dict[str, str] = {}
+        self._forms: dict[tuple[str, CtxFont], str] = {}
+
+    def draw(self, canvas: Canvas, key: str, font: CtxFont, x: float, y: float):
+        """draw the value of `key` with its baseline starting at (x, y)"""
+        name = self._forms.get((key, font))
+        if name is None:
+            name = self._forms[key, font] = f"reportex_ref{len(self._forms)}"
+        canvas.saveState()
+        canvas.translate(x, y)
+        canvas.doForm(name)
+        canvas.restoreState()
+
+    @contextmanager
+    def active(self):
+        """draw the references met in this thread or task into these"""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def fill(self, canvas: Canvas):
+        for (key, font), name in self._forms.items():
+            value = self.values.get(key, "??")
+            width = font.string_width(value)
+            canvas.beginForm(name, 0, -font.descent, width, font.ascent)
+            canvas.setFont(font.name, font.size)
+            canvas.drawString(0, 0, value)
+            canvas.endForm()
+
+
+# the references of the document being drawn, one per render
+_current: ContextVar[References | None] = ContextVar("references", default=None)
+
+
+class Anchor(Widget):
+    """marks a place in the document, a `PageRef` prints the page it is on"""
+
+    def __init__(self, name: str):
+        super().__init__(0, 0)
+        self.name = name
+
+    def layout(self, constraints: BoxConstraints) -> Size:
+        return Size(0, 0)
+
+    def draw(self, canvas: Canvas, parent_pos: Position):
+        references = _current.get()
+        if references is not None:
+            references.values[page_key(self.name)] = str(canvas.getPageNumber())
+
+
+class _FormattedReference(Widget):
+    """a line of text with `format` fields, the deferred ones are drawn
+    through `References` in `digits` digits worth of room"""
+
+    font: CtxFont = CtxFont("Helvetica", 10)
+
+    def __init__(self, format: str, font: CtxFont | None, digits: int):
+        super().__init__(None, None)
+        self.format = format
+        if font:
+            self.font = font
+        self.digits = digits
+
+    def _immediate(self, canvas: Canvas) -> dict[str, str]:
+        return {}
+
+    def _deferred(self) -> dict[str, str]:
+        """format fields drawn through references, to their reference key"""
+        return {}
+
+    def _width(self, text: str) -> float:
+        return self.font.string_width(text)
+
+    def layout(self, constraints: BoxConstraints) -> Size:
+        sample = "0" * self.digits
+        fields = {name: sample for _, name, _, _ in Formatter().parse(self.format)}
+        width = self._width(self.format.format(**fields))
+        size = Size(min(width, constraints.max_width), self.font.line_height)
+        self.set_size(size)
+        return size
+
+    def draw(self, canvas: Canvas, parent_pos: Position):
+        pos = parent_pos.resolve(self.offset)
+        ascent = self.font.ascent
+        immediate = self._immediate(canvas)
+        deferred = self._deferred()
+        references = _current.get()
+        room = self._width("0" * self.digits)
+        x = pos.x
+        y = pos.y - ascent
+        canvas.setFont(self.font.name, self.font.size)
+        for literal, field, _, _ in Formatter().parse(self.format):
+            text = literal
+            if field in immediate:
+                text += immediate[field]
+            if text:
+                canvas.drawString(x, y, text)
+                x += self._width(text)
+            if field in deferred and references is not None:
+                references.draw(canvas, deferred[field], self.font, x, y)
+                x += room
+
+
+class PageNumber(_FormattedReference):
+    """"Page 3 of 12" and the like. `{page}` is the pdf page the widget is
+    drawn on, `{pages}` the page count, filled in when the document is saved
+    """
+
+    def __init__(
+        self,
+        format: str = "Page {page} of {pages}",
+        *,
+        font: CtxFont | None = None,
+        digits: int = 3,
+    ):
+        super().__init__(format, font, digits)
+
+    def _immediate(self, canvas: Canvas) -> dict[str, str]:
+        return {"page": str(canvas.getPageNumber())}
+
+    def _deferred(self) -> dict[str, str]:
+        return {"pages": PAGES}
+
+
+class PageRef(_FormattedReference):
+    """the `{page}` an `Anchor` is on, wherever in the document it is"""
+
+    def __init__(
+        self,
+        anchor: str,
+        format: str = "{page}",
+        *,
+        font: CtxFont | None = None,
+        digits: int = 3,
+    ):
+        super().__init__(format, font, digits)
+        self.anchor = anchor
+
+    def _deferred(self) -> dict[str, str]:
+        return {"page": page_key(self.anchor)}
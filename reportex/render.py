@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+
+from reportlab.pdfgen.canvas import Canvas
+
+from reportex.core import (
+    _layout_state,
+    BoxConstraints,
+    LayoutField,
+    Position,
+    Size,
+    Widget,
+)
+
+
+class RenderTree:
+    """the layout of a widget tree, kept apart from the widgets.
+
+    while the tree is active everything layout and draw set on a widget (the
+    `LayoutField`s) is stored in the tree, the widgets keep what they were
+    built with. so one tree of widgets can be laid out by any number of render
+    trees at once, in different threads or for different documents, and each
+    render tree draws its own layout.
+
+    the tree is active in the thread that activates it, work handed to other
+    threads goes through `run`. the first tree made puts the `LayoutField`s
+    in place, from then on every widget attribute they cover is a little
+    slower to use, with or without a tree.
+    """
+
+    def __init__(self, root: Widget | None = None):
+        LayoutField.arm()
+        self.root = root
+        self.size: Size | None = None
+        # object -> {field: value}, see `LayoutField`
+        self._state: dict[object, dict] = {}
+
+    @classmethod
+    def layout(cls, root: Widget, constraints: BoxConstraints) -> "RenderTree":
+        tree = cls(root)
+        tree.size = tree.run(root.layout, constraints)
+        return tree
+
+    def draw(self, canvas: Canvas, parent_pos: Position):
+        self.run(self.root.draw, canvas, parent_pos)
+
+    @contextmanager
+    def active(self):
+        token = _layout_state.set(self._state)
+        try:
+            yield self
+        finally:
+            _layout_state.reset(token)
+
+    def run(self, func, *args):
+        """call `func` with the tree active, in whatever thread runs it"""
+        with self.active():
+            return func(*args)
+
+    def fields(self, obj) -> dict:
+        """what the layout set on `obj`"""
+        return dict(self._state.get(obj, {}))
+
+    def __len__(self):
+        return len(self._state)
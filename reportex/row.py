@@ -6,12 +6,13 @@ from reportex.core import (
     Position,
     BoxConstraints,
 )
+from reportex.engine import Stepped
 from reportex.exceptions import OverFlowError
 
 from reportex.widgets import Expanded, Canvas
 
 
-class Row(MultiChildrenWidget):
+class Row(Stepped, MultiChildrenWidget):
     def __init__(
         self,
         children,
@@ -34,6 +35,14 @@ class Row(MultiChildrenWidget):
     def client_origin(self):
         return super().client_origin
 
+    def intrinsic_widths(self) -> tuple[float, float]:
+        min_width = max_width = 0
+        for child in self.children:
+            cmin, cmax = child.intrinsic_widths()
+            min_width += cmin
+            max_width += cmax
+        return min_width, max_width
+
     def _get_total_flex(self):
         flex = 0
         for child in self.children:
@@ -41,7 +50,7 @@ class Row(MultiChildrenWidget):
                 flex += child.flex
         return flex
 
-    def layout(self, constraints: BoxConstraints) -> Size:
+    def layout_steps(self, constraints: BoxConstraints):
         size = Size(constraints.max_width, 0)
         if len(self.children) == 0:
             self.set_size(Size(0, 0))
@@ -56,12 +65,16 @@ class Row(MultiChildrenWidget):
             if isinstance(child, Expanded):
                 expanded.append(child)
                 continue
-            child_size = child.layout(
+            child_size = yield child, (
                 BoxConstraints(0, 0, remwidth, constraints.max_height)
             )
             if remwidth == 0 and (child.width > 0 or child.height > 0):
-                breakpoint()
-                raise OverFlowError(f"insufficient space for {child}")
+                raise OverFlowError(
+                    f"insufficient space for {child}",
+                    widget=child,
+                    required=child_size,
+                    available=Size(remwidth, constraints.max_height),
+                )
 
             if child_size.height > size.height:
                 size.height = child_size.height
@@ -70,7 +83,12 @@ class Row(MultiChildrenWidget):
                 child_size.width > remwidth
                 or child_size.height > constraints.max_height
             ):
-                raise OverFlowError(f"insufficient space for {child}")
+                raise OverFlowError(
+                    f"insufficient space for {child}",
+                    widget=child,
+                    required=child_size,
+                    available=Size(remwidth, constraints.max_height),
+                )
 
             remwidth -= child_size.width
 
@@ -78,7 +96,7 @@ class Row(MultiChildrenWidget):
             width_frac = remwidth / flex_total
             for exp in expanded:
                 wdth = width_frac * exp.flex
-                exp_size = exp.layout(
+                exp_size = yield exp, (
                     BoxConstraints(0, 0, wdth, constraints.max_height)
                 )
                 if exp_size.height > size.height:
@@ -161,7 +179,7 @@ class Row(MultiChildrenWidget):
             child.offset = Position(x + space + (constraints.max_width - rwidth), y)
             rwidth -= child.width + space
 
-    def draw(self, canvas: Canvas, parent_pos: Position):
+    def draw_steps(self, canvas: Canvas, parent_pos: Position):
         pos = parent_pos.resolve(self.offset)
         for child in self.children:
-            child.draw(canvas, pos)
+            yield child, pos
@@ -0,0 +1,255 @@
+from dataclasses import dataclass
+
+from reportex.core import DISC, MultiPageWidget, Position, Widget
+from reportex.flow import Flow
+from reportex.multpage import MultiPage
+from reportex.table import MultiPageTable, Table, TableRow
+from reportex.text import Text
+
+
+@dataclass(eq=False)
+class LaidOutBox:
+    """the area a widget covers on a pdf page, in pdf coordinates"""
+
+    widget: Widget
+    page: int
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+    parent: "LaidOutBox | None"
+    depth: int
+
+    def contains(self, x: float, y: float) -> bool:
+        return self.x0 <= x <= self.x1 and self.y0 <= y <= self.y1
+
+    def intersects(self, x0: float, y0: float, x1: float, y1: float) -> bool:
+        return self.x0 < x1 and x0 < self.x1 and self.y0 < y1 and y0 < self.y1
+
+
+class PageIndex:
+    """a uniform grid over the boxes of one page, each grid cell lists the
+    boxes that touch it"""
+
+    def __init__(self, page: int, width: float, height: float, cell: float = 64):
+        self.page = page
+        self.width = width
+        self.height = height
+        self.cell = cell
+        self.boxes: list[LaidOutBox] = []
+        self._grid: dict[tuple[int, int], list[int]] = {}
+
+    def _cells(self, x0, y0, x1, y1):
+        cell = self.cell
+        for gx in range(int(x0 // cell), int(x1 // cell) + 1):
+            for gy in range(int(y0 // cell), int(y1 // cell) + 1):
+                yield gx, gy
+
+    def add(self, box: LaidOutBox) -> int:
+        ind = len(self.boxes)
+        self.boxes.append(box)
+        for key in self._cells(box.x0, box.y0, box.x1, box.y1):
+            self._grid.setdefault(key, []).append(ind)
+        return ind
+
+    def at(self, x: float, y: float) -> list[LaidOutBox]:
+        """boxes under the point, outermost first"""
+        cell = self.cell
+        candidates = self._grid.get((int(x // cell), int(y // cell)), [])
+        return [self.boxes[i] for i in candidates if self.boxes[i].contains(x, y)]
+
+    def query(self, x0: float, y0: float, x1: float, y1: float) -> list[LaidOutBox]:
+        """boxes intersecting the rectangle"""
+        found = set()
+        for key in self._cells(x0, y0, x1, y1):
+            found.update(self._grid.get(key, ()))
+        boxes = self.boxes
+        return [boxes[i] for i in sorted(found) if boxes[i].intersects(x0, y0, x1, y1)]
+
+    def overlaps(self) -> list[tuple[LaidOutBox, LaidOutBox]]:
+        """pairs of boxes that overlap although neither contains the other in
+        the widget tree"""
+        pairs = set()
+        boxes = self.boxes
+        for members in self._grid.values():
+            for n, i in enumerate(members):
+                a = boxes[i]
+                for j in members[n + 1 :]:
+                    if (i, j) in pairs:
+                        continue
+                    b = boxes[j]
+                    if a.intersects(
+                        b.x0 + DISC, b.y0 + DISC, b.x1 - DISC, b.y1 - DISC
+                    ) and not _related(a, b):
+                        pairs.add((i, j))
+        return [(boxes[i], boxes[j]) for i, j in sorted(pairs)]
+
+    def outside(self) -> list[LaidOutBox]:
+        """boxes that reach past the page edges"""
+        return [
+            box
+            for box in self.boxes
+            if box.x0 < -DISC
+            or box.y0 < -DISC
+            or box.x1 > self.width + DISC
+            or box.y1 > self.height + DISC
+        ]
+
+
+class LayoutIndex:
+    """where every widget of a laid out `Document` ended up, page by page"""
+
+    def __init__(self, width: float, height: float, cell: float = 64):
+        self.width = width
+        self.height = height
+        self.cell = cell
+        self.pages: list[PageIndex] = []
+
+    @classmethod
+    def build(cls, document, cell: float = 64) -> "LayoutIndex":
+        width, height = document.page_size
+        index = cls(width, height, cell)
+        boxes: list[LaidOutBox] = []
+        for widget, page, pos, parent, depth in laid_out(document):
+            box = LaidOutBox(
+                widget,
+                page,
+                pos.x,
+                pos.y - (widget.height or 0),
+                pos.x + (widget.width or 0),
+                pos.y,
+                boxes[parent] if parent >= 0 else None,
+                depth,
+            )
+            if isinstance(widget, (MultiPage, MultiPageWidget)):
+                # a box running on over pages is cut off where its first page ends
+                box.y0 = max(box.y0, 0)
+            index._page(page).add(box)
+            boxes.append(box)
+        return index
+
+    def _page(self, page: int) -> PageIndex:
+        while len(self.pages) <= page:
+            self.pages.append(
+                PageIndex(len(self.pages), self.width, self.height, self.cell)
+            )
+        return self.pages[page]
+
+    def page(self, page: int) -> PageIndex:
+        return self._page(page)
+
+    def at(self, page: int, x: float, y: float) -> list[LaidOutBox]:
+        return self._page(page).at(x, y)
+
+    def outside(self) -> list[LaidOutBox]:
+        return [box for index in self.pages for box in index.outside()]
+
+    def overlaps(self) -> list[tuple[LaidOutBox, LaidOutBox]]:
+        return [pair for index in self.pages for pair in index.overlaps()]
+
+
+def laid_out(document):
+    """walk a laid out document in draw order without recursion.
+
+    yields (widget, pdf page, widget position, parent ordinal, depth) where
+    the parent ordinal counts the widgets yielded before, -1 for the pages.
+    """
+    page_height = document.page_size[1]
+    ordinal = 0
+    first = 0
+    for root in document.pages:
+        last = first
+        stack = [(root, Position(0, page_height), first, -1, 0)]
+        while stack:
+            widget, parent_pos, page, parent, depth = stack.pop()
+            if hasattr(widget, "_aligned_offset"):
+                # `Align` places itself in its parent
+                offset = widget._aligned_offset()
+            else:
+                offset = widget.offset or Position(0, 0)
+            pos = parent_pos.resolve(offset)
+            yield widget, page, pos, parent, depth
+            children = list(_children(widget, pos, page))
+            for child, child_pos, child_page in reversed(children):
+                stack.append((child, child_pos, child_page, ordinal, depth + 1))
+                last = max(last, child_page)
+            ordinal += 1
+        first = last + 1
+
+
+def _children(widget: Widget, pos: Position, page: int):
+    if isinstance(widget, MultiPage):
+        yield from _multipage_children(widget, pos, page)
+    elif isinstance(widget, MultiPageTable):
+        yield from _table_pages(widget, pos, page)
+    elif isinstance(widget, Flow):
+        yield from _flow_pages(widget, pos, page)
+    elif isinstance(widget, Table):
+        for row in widget.allowed_rows:
+            yield row, pos, page
+    elif isinstance(widget, TableRow):
+        for cell in widget.cells:
+            yield cell, pos, page
+    elif getattr(widget, "children", None):
+        for child in widget.children:
+            yield child, pos, page
+    elif getattr(widget, "child", None) is not None:
+        yield widget.child, pos, page
+
+
+def _multipage_children(multipage: MultiPage, pos: Position, page: int):
+    for number, placements in enumerate(multipage.plan.pages):
+        origin = pos if number == 0 else multipage.page_origin()
+        for placement in placements:
+            # multi page widgets go on with their other pages themselves
+            if placement.slice in (None, 0):
+                yield placement.widget, origin, page + number
+
+
+def _table_pages(table: MultiPageTable, pos: Position, page: int):
+    for number in range(table.page_count):
+        if number:
+            pos = table.parent.page_origin()
+        above, below = table._page_extras[number]
+        if table.heading is not None and table._page_heading_height(number):
+            yield table.heading, pos, page + number
+        for row in above + table._page_rows(number) + below:
+            yield row, pos, page + number
+        if table.footer is not None:
+            y = table.page_used(number) - table._footer_height
+            yield table.footer, Position(pos.x, pos.resolvey(y)), page + number
+
+
+def _flow_pages(flow: Flow, pos: Position, page: int):
+    for number, pieces in enumerate(flow._pages):
+        if number:
+            pos = flow.parent.page_origin()
+        for piece in pieces:
+            yield piece, pos, page + number
+
+
+def _related(a: LaidOutBox, b: LaidOutBox) -> bool:
+    """whether one box is an ancestor of the other"""
+    if a.depth > b.depth:
+        a, b = b, a
+    while b is not None and b.depth > a.depth:
+        b = b.parent
+    return b is a
+
+
+def widget_path(widget: Widget) -> list[str]:
+    """the widgets from the root down to `widget`, e.g. for error reports"""
+    path = []
+    while widget is not None:
+        name = type(widget).__name__
+        parent = widget.parent
+        siblings = getattr(parent, "children", None) or getattr(parent, "rows", None)
+        if siblings and widget in siblings:
+            name += f"[{siblings.index(widget)}]"
+        if isinstance(widget, Text):
+            text = widget.text if len(widget.text) <= 20 else widget.text[:20] + "..."
+            name += f"({text!r})"
+        path.append(name)
+        widget = parent
+    path.reverse()
+    return path
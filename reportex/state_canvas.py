@@ -0,0 +1,331 @@
+from reportlab.lib.rl_accel import fp_str
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfgen.canvas import Canvas
+
+
+class _Opaque:
+    """a state value set behind the tracker's back, e.g. by `setFillGray`"""
+
+
+GRAPHICS_KEYS = ("fill", "fill_alpha", "stroke", "stroke_alpha", "line_width")
+TEXT_KEYS = ("fill", "fill_alpha", "font", "word_space")
+ALL_KEYS = GRAPHICS_KEYS + ("font", "word_space")
+
+# draw calls that paint with the current state but leave it untouched
+_SHAPES = frozenset(
+    [
+        "rect",
+        "roundRect",
+        "circle",
+        "ellipse",
+        "wedge",
+        "arc",
+        "bezier",
+        "grid",
+        "drawPath",
+        "drawImage",
+        "drawInlineImage",
+    ]
+)
+_STRINGS = frozenset(["drawString", "drawRightString", "drawCentredString"])
+# state changes that don't touch the tracked values
+_UNTRACKED = frozenset(
+    [
+        "translate",
+        "scale",
+        "rotate",
+        "skew",
+        "transform",
+        "clipPath",
+        "setDash",
+        "setLineCap",
+        "setLineJoin",
+        "setMiterLimit",
+    ]
+)
+_QUERIES = frozenset(
+    [
+        "getPageNumber",
+        "hasForm",
+        "stringWidth",
+        "getAvailableFonts",
+        "beginPath",
+    ]
+)
+
+
+class _TextObject:
+    """wraps a reportlab text object, dropping font and word space operators
+    that would set the value the text state already has"""
+
+    def __init__(self, obj, emitted: dict):
+        self._obj = obj
+        self._start = {"font": emitted["font"], "word_space": emitted["word_space"]}
+        self._current = dict(self._start)
+        self._changes: dict = {}
+        self._relied: dict = {}
+
+    def __getattr__(self, name):
+        attr = getattr(self._obj, name)
+        if name.startswith("setFill"):
+            self._changes["fill"] = self._changes["fill_alpha"] = _Opaque()
+        elif name.startswith("setStroke"):
+            self._changes["stroke"] = self._changes["stroke_alpha"] = _Opaque()
+        return attr
+
+    def _skip(self, key, value, code) -> bool:
+        if self._current[key] != value or isinstance(value, _Opaque):
+            return False
+        if key not in self._changes:
+            # only holds while the text state is what it was at beginText
+            self._relied.setdefault(key, code)
+        return True
+
+    def _set(self, key, value):
+        self._current[key] = value
+        self._changes[key] = value
+
+    def setFont(self, psfontname, size, leading=None):
+        if leading is None:
+            leading = size * 1.2
+        key = (psfontname, size, leading)
+        dynamic = pdfmetrics.getFont(psfontname)._dynamicFont
+        if not dynamic:
+            ref = self._obj._doc.getInternalFontName(psfontname)
+            code = "%s %s Tf %s TL" % (ref, fp_str(size), fp_str(leading))
+            if self._skip("font", key, code):
+                # keep the object's metrics in sync without the operator
+                self._obj._fontname = psfontname
+                self._obj._fontsize = size
+                self._obj._leading = leading
+                return
+        self._obj.setFont(psfontname, size, leading)
+        # ttf fonts emit their subset font lazily, so their state is not known
+        self._set("font", _Opaque() if dynamic else key)
+
+    def setWordSpace(self, wordSpace):
+        if self._skip("word_space", wordSpace, "%s Tw" % fp_str(wordSpace)):
+            self._obj._wordSpace = wordSpace
+            return
+        self._obj.setWordSpace(wordSpace)
+        self._set("word_space", wordSpace)
+
+    def setLeading(self, leading):
+        self._obj.setLeading(leading)
+        self._set("font", _Opaque())
+
+
+class StateCanvas:
+    """a `Canvas` wrapper that only emits operators which change something.
+
+    widgets set colors, line width and font as usual, the wrapper remembers
+    the requested values and writes them just before something is painted,
+    and only when they differ from what the pdf graphics state already holds.
+    `saveState`/`restoreState` pairs stay virtual unless an untracked state
+    change (a transform, a clip, ...) happens in between, and consecutive
+    `line` calls with the same style are stroked as a single path.
+    """
+
+    def __init__(self, canvas: Canvas):
+        self._canvas = canvas
+        self._reset()
+        self._forms: list[tuple] = []
+
+    def _reset(self):
+        canvas = self._canvas
+        defaults = {
+            "fill": (0, 0, 0),
+            "fill_alpha": 1,
+            "stroke": (0, 0, 0),
+            "stroke_alpha": 1,
+            "line_width": 1,
+            "font": (canvas._fontname, canvas._fontsize, canvas._leading),
+            "word_space": 0,
+        }
+        self._desired = dict(defaults)
+        self._emitted = dict(defaults)
+        # [desired at saveState, emitted at the real q or None while virtual]
+        self._stack: list[list] = []
+        self._path = None
+        self._path_end = None
+        self._path_dir = None
+
+    def __getattr__(self, name):
+        attr = getattr(self._canvas, name)
+        if name in _QUERIES:
+            return attr
+        self._flush()
+        if not callable(attr):
+            return attr
+        if name in _SHAPES:
+            self._sync(GRAPHICS_KEYS)
+        elif name in _STRINGS:
+            self._sync(TEXT_KEYS)
+        elif name in _UNTRACKED:
+            self._materialize()
+        elif name != "doForm":
+            # anything else may change tracked values in ways we can't follow
+            self._sync(ALL_KEYS)
+            self._materialize()
+            for key in ALL_KEYS:
+                self._desired[key] = self._emitted[key] = _Opaque()
+        return attr
+
+    def _flush(self):
+        if self._path is not None:
+            self._canvas.drawPath(self._path, stroke=1, fill=0)
+            self._path = None
+            self._path_end = None
+            self._path_dir = None
+
+    def _materialize(self):
+        for entry in self._stack:
+            if entry[1] is None:
+                self._canvas.saveState()
+                entry[1] = dict(self._emitted)
+
+    def _emitting(self, key):
+        self._flush()
+        # a virtual save can only bring back values we know how to set again
+        if any(
+            entry[1] is None and isinstance(entry[0][key], _Opaque)
+            for entry in self._stack
+        ):
+            self._materialize()
+
+    def _sync(self, keys):
+        desired = self._desired
+        emitted = self._emitted
+        canvas = self._canvas
+        for key in keys:
+            value = desired[key]
+            if value == emitted[key] or isinstance(value, _Opaque):
+                continue
+            self._emitting(key)
+            if key == "fill":
+                canvas.setFillColorRGB(*value)
+            elif key == "stroke":
+                canvas.setStrokeColorRGB(*value)
+            elif key == "fill_alpha":
+                canvas.setFillAlpha(value)
+            elif key == "stroke_alpha":
+                canvas.setStrokeAlpha(value)
+            elif key == "line_width":
+                canvas.setLineWidth(value)
+            elif key == "font":
+                canvas.setFont(*value)
+            elif key == "word_space":
+                canvas._code.append("BT %s Tw ET" % fp_str(value))
+            emitted[key] = value
+
+    def saveState(self):
+        self._stack.append([dict(self._desired), None])
+
+    def restoreState(self):
+        if not self._stack:
+            self._flush()
+            self._canvas.restoreState()
+            for key in ALL_KEYS:
+                self._desired[key] = self._emitted[key] = _Opaque()
+            return
+        desired, emitted = self._stack.pop()
+        self._desired = desired
+        if emitted is not None:
+            self._flush()
+            self._canvas.restoreState()
+            self._emitted = emitted
+
+    def setFillColorRGB(self, r, g, b, alpha=None):
+        self._desired["fill"] = (r, g, b)
+        if alpha is not None:
+            self._desired["fill_alpha"] = alpha
+
+    def setStrokeColorRGB(self, r, g, b, alpha=None):
+        self._desired["stroke"] = (r, g, b)
+        if alpha is not None:
+            self._desired["stroke_alpha"] = alpha
+
+    def setFillAlpha(self, alpha):
+        self._desired["fill_alpha"] = alpha
+
+    def setStrokeAlpha(self, alpha):
+        self._desired["stroke_alpha"] = alpha
+
+    def setLineWidth(self, width):
+        self._desired["line_width"] = width
+
+    def setFont(self, psfontname, size, leading=None):
+        if leading is None:
+            leading = size * 1.2
+        self._desired["font"] = (psfontname, size, leading)
+
+    def line(self, x1, y1, x2, y2):
+        self._sync(("stroke", "stroke_alpha", "line_width"))
+        direction = (x2 - x1, y2 - y1)
+        if self._path is None:
+            self._path = self._canvas.beginPath()
+            self._path.moveTo(x1, y1)
+        elif self._path_end != (x1, y1) or not _same_direction(
+            self._path_dir, direction
+        ):
+            self._path.moveTo(x1, y1)
+        self._path.lineTo(x2, y2)
+        self._path_end = (x2, y2)
+        self._path_dir = direction
+
+    def lines(self, linelist):
+        for x1, y1, x2, y2 in linelist:
+            self.line(x1, y1, x2, y2)
+
+    def beginText(self, *args, **kwargs):
+        self._flush()
+        self._sync(("font", "word_space"))
+        return _TextObject(self._canvas.beginText(*args, **kwargs), self._emitted)
+
+    def drawText(self, aTextObject):
+        self._flush()
+        self._sync(("fill", "fill_alpha"))
+        if not isinstance(aTextObject, _TextObject):
+            self._sync(("font", "word_space"))
+            self._canvas.drawText(aTextObject)
+            return
+
+        obj = aTextObject._obj
+        for key, code in aTextObject._relied.items():
+            if self._emitted[key] != aTextObject._start[key]:
+                # the text state moved since beginText, put the skipped
+                # operator back at the start of the text object
+                obj._code.insert(1, code)
+        for key, value in aTextObject._changes.items():
+            # text state outlives the text object, like it does in the pdf
+            self._emitting(key)
+            self._desired[key] = self._emitted[key] = value
+        self._canvas.drawText(obj)
+
+    def beginForm(self, *args, **kwargs):
+        self._flush()
+        self._forms.append((self._desired, self._emitted, self._stack))
+        self._canvas.beginForm(*args, **kwargs)
+        # a form inherits the state of whoever draws it, assume nothing
+        self._reset()
+        for key in ALL_KEYS:
+            self._emitted[key] = _Opaque()
+
+    def endForm(self, **extra_attributes):
+        self._flush()
+        self._canvas.endForm(**extra_attributes)
+        self._desired, self._emitted, self._stack = self._forms.pop()
+
+    def showPage(self):
+        self._flush()
+        self._canvas.showPage()
+        self._reset()
+
+    def save(self):
+        self._flush()
+        self._canvas.save()
+
+
+def _same_direction(a, b) -> bool:
+    # collinear and pointing the same way, so the joint renders like two lines
+    return a[0] * b[1] == a[1] * b[0] and a[0] * b[0] + a[1] * b[1] > 0
@@ -1,3 +1,7 @@
+from bisect import bisect_right
+from itertools import accumulate, islice
+from typing import Callable, Iterable
+
 from reportlab.pdfgen.canvas import Canvas
 from reportex.container import Container
 from reportex.core import (
@@ -11,11 +15,14 @@ from reportex.core import (
     Colors,
     INFINITY,
     MultiPageWidget,
-    DocInfo,
+    DISC,
+    LayoutField,
 )
 
 
+from reportex.display_list import DisplayList, RecordingCanvas
 from reportex.exceptions import OverFlowError
+from reportex.grid import GridBatch
 
 
 class Cell(Container):
@@ -45,81 +52,275 @@ class Cell(Container):
         self.override_column_divider = override_column_divider
         self.override_row_divider = override_row_divider
 
+    def intrinsic_widths(self) -> tuple[float, float]:
+        # a cell fills its column, the width its last layout gave it says
+        # nothing about its content
+        border_width = self.border.left.width + self.border.right.width
+        cmin, cmax = self.child.intrinsic_widths() if self.child else (0, 0)
+        return cmin + border_width, cmax + border_width
+
 
 class TableRow(Widget):
     parent: "Table"
     background: Color
+    cells = LayoutField()
 
     def __init__(
         self,
         *,
         cells: list[Cell],
         divider: BorderSide = BorderSide(),
-        height=26,
+        height: float | None = 26,
+        min_height: float = 0,
         margin=0,
         background: Color = Colors.white,
+        keep_with_next: bool = False,
+        data=None,
     ):
         super().__init__(None, None)
         self._children = cells
+        self._cell_borders = [cell.border for cell in cells]
+        # the boxes the row wraps its cells in draw the borders and background
+        for cell in cells:
+            if not cell.color:
+                cell.color = background
+            cell.border = Border.zero()
         self.cells: list[Cell] = []
         self.divider = divider
+        self.row_height = height
         self.height = height
+        self.min_height = min_height
         self.margin = margin
         self.background = background
+        self.keep_with_next = keep_with_next
+        # raw values of the row, read by `reportex.aggregate` specs
+        self.data = data
 
     @property
     def column_data(self):
         return self.parent.columns
 
+    def _box_border(self, ind: int) -> Border:
+        cell = self._children[ind]
+        coldata: "TableColumnData" = self.column_data[ind]
+        cb = self._cell_borders[ind]
+        return Border(
+            right=cb.right if cell.override_column_divider else coldata.divider,
+            left=cb.left,
+            top=cb.top,
+            bottom=cb.bottom if cell.override_row_divider else self.divider,
+        )
+
     def init_cells(self):
+        self.cells = []
+        columns = self.column_data
         for ind, cell in enumerate(self._children):
-            if not cell.color:
-                cell.color = self.background
-            coldata: "TableColumnData" = self.column_data[ind]
-            cb = cell.border
-            cell.border = Border.zero()
+            coldata: "TableColumnData" = columns[ind]
+            border = self._box_border(ind)
             box = Container(
                 child=cell,
                 width=coldata.width,
                 height=self.height,
-                border=Border(
-                    right=cb.right if cell.override_column_divider else coldata.divider,
-                    left=cb.left,
-                    top=cb.top,
-                    bottom=cb.bottom if cell.override_row_divider else self.divider,
-                ),
+                border=border,
                 color=cell.color,
             )
             self.cells.append(box)
             box.parent = self
 
     def layout(self, constraints: BoxConstraints) -> Size:
-        if constraints.max_height < self.height:
-            raise OverFlowError(f"{self.height} is greater than available height")
-        self.init_cells()
-        size = Size(constraints.max_width, self.height)
-        width = 0
-        for ind, cell in enumerate(self.cells):
-            coldata = self.column_data[ind]
+        return self._layout(constraints, clip=False)
 
-            cell_size = cell.layout(BoxConstraints(0, 0, coldata.width, self.height))
+    def layout_clipped(self, constraints: BoxConstraints) -> Size:
+        """lay the row out no taller than `constraints.max_height`, the
+        cells are cut off at the bottom"""
+        return self._layout(constraints, clip=True)
 
-            if cell_size.height > size.height:
-                size.height = cell_size.height
+    def measure(self) -> float:
+        """height of the tallest cell with its content wrapped to the column,
+        the content stays laid out"""
+        height = self.min_height
+        for ind, cell in enumerate(self._children):
+            if cell.child is None:
+                continue
+            border = self._box_border(ind)
+            inner_width = (
+                self.column_data[ind].width - border.left.width - border.right.width
+            )
+            child_size = cell.child.layout(BoxConstraints(0, 0, inner_width, INFINITY))
+            cell_height = child_size.height + border.top.width + border.bottom.width
+            if cell_height > height:
+                height = cell_height
+        return height
+
+    def _layout(self, constraints: BoxConstraints, clip: bool) -> Size:
+        columns = self.column_data
+        measured = self.row_height is None
+        height = self.measure() if measured else self.row_height
+        if constraints.max_height < height:
+            if not clip:
+                raise OverFlowError(
+                    f"{height} is greater than available height",
+                    widget=self,
+                    required=Size(constraints.max_width, height),
+                    available=Size(constraints.max_width, constraints.max_height),
+                )
+            height = constraints.max_height
+            # the content is laid out again in what is left of it
+            measured = False
+        self.height = height
+        self.init_cells()
+        for ind, box in enumerate(self.cells):
+            if measured:
+                self._place_measured(box, height)
+            else:
+                box.layout(BoxConstraints(0, 0, columns[ind].width, height))
 
-            cell.offset = Position(width, 0)
+        width = 0
+        for ind, box in enumerate(self.cells):
+            coldata = columns[ind]
+            box.offset = Position(width, 0)
             width += coldata.width + coldata.margin
 
+        size = Size(constraints.max_width, height)
         self.set_size(size)
         return size
 
+    @staticmethod
+    def _place_measured(box: Container, height: float):
+        """size a cell's box and the cell filling it around the content
+        `measure` laid out, as their layout would"""
+        size = Size(box.width, height)
+        box.set_size(size)
+        cell: Cell = box.child
+        cell_size = Size(box.client_width, box.client_height)
+        cell.set_size(cell_size)
+        cell._place_child(cell_size)
+        box._place_child(size)
+
     def draw(self, canvas: Canvas, parent_pos: Position):
         pos = parent_pos.resolve(self.offset)
         for cell in self.cells:
             cell.draw(canvas, pos)
 
+    def add_to_grid(self, grid: GridBatch, parent_pos: Position):
+        pos = parent_pos.resolve(self.offset)
+        grid.begin_row()
+        for box in self.cells:
+            box_pos = pos.resolve(box.offset)
+            border = box.border
+            if box.color:
+                # the client area, as `Container.paint` fills it
+                grid.add_fill(
+                    box.color,
+                    box_pos.x + border.left.width,
+                    box_pos.y - border.top.width,
+                    box.client_width,
+                    box.client_height,
+                )
+            lines = box.get_border_lines(box_pos)
+            for name in ("top", "right", "bottom", "left"):
+                line = lines[name]
+                side = getattr(border, name)
+                grid.add_line(side, line.x1, line.y1, line.x2, line.y2)
+
+    def draw_content(self, canvas: Canvas, parent_pos: Position):
+        """draw the cells' children, their backgrounds and borders are left to
+        the table's `GridBatch`"""
+        pos = parent_pos.resolve(self.offset)
+        for box in self.cells:
+            cell: Cell = box.child
+            if cell.child:
+                box_pos = pos.resolve(box.offset)
+                cell.child.draw(canvas, box_pos.resolve(cell.offset))
+
+
+def _draw_batched(
+    canvas: Canvas, pos: Position, rows: list[TableRow], border_of: "Table" = None
+):
+    """the rows' backgrounds and rules through one `GridBatch`, then their
+    content. drawn cell by cell, a background covers the anti-aliased edge of
+    the rules drawn before it, batched they all go under the rules, which is
+    why `batch_grid` is off by default"""
+    grid = GridBatch()
+    for row in rows:
+        row.add_to_grid(grid, pos)
+    if border_of is not None:
+        border_of._add_border_to_grid(grid, pos)
+    grid.draw(canvas)
+    for row in rows:
+        row.draw_content(canvas, pos)
+
+
+def _sample_rows(rows: list[TableRow], sample: int | None) -> list[TableRow]:
+    if sample is None or len(rows) <= sample:
+        return rows
+    step = len(rows) / sample
+    return [rows[int(i * step)] for i in range(sample)]
+
+
+def _content_widths(
+    columns: list["TableColumnData"], rows: list[TableRow], sample: int | None
+) -> tuple[list[float], list[float]]:
+    mins = [0.0] * len(columns)
+    maxs = [0.0] * len(columns)
+    for row in _sample_rows(rows, sample):
+        for ind, cell in enumerate(row._children[: len(columns)]):
+            cmin, cmax = cell.intrinsic_widths()
+            if cmin > mins[ind]:
+                mins[ind] = cmin
+            if cmax > maxs[ind]:
+                maxs[ind] = cmax
+
+    for ind, col in enumerate(columns):
+        # the column divider is drawn inside the cell
+        mins[ind] += col.divider.width + DISC
+        maxs[ind] += col.divider.width + DISC
+    return mins, maxs
+
+
+def _solve_column_widths(
+    mins: list[float], maxs: list[float], flexes: list[float], width: float
+) -> list[float]:
+    total_min = sum(mins)
+    total_max = sum(maxs)
+    if total_max <= width:
+        # everything fits unwrapped, the rest is shared out by flex
+        total_flex = sum(flexes)
+        if not total_flex:
+            return list(maxs)
+        frac = (width - total_max) / total_flex
+        return [mx + frac * flex for mx, flex in zip(maxs, flexes)]
+    if total_min >= width:
+        scale = width / total_min if total_min else 0
+        return [mn * scale for mn in mins]
+    frac = (width - total_min) / (total_max - total_min)
+    return [mn + (mx - mn) * frac for mn, mx in zip(mins, maxs)]
+
+
+def _rows_key(rows: Iterable[TableRow]) -> list[tuple]:
+    # the rows and their cells, compared by identity
+    return [(row, *row._children) for row in rows]
+
+
+def _set_auto_column_widths(table: "Table | MultiPageTable", width: float):
+    """size the columns from their content, measured again only when the
+    width changes or rows or cells are added, removed or replaced"""
+    key = (width, table._rows_key)
+    cached = table._auto_widths
+    if cached is None or cached[0] != key:
+        mins, maxs = _content_widths(
+            table.columns, table._sized_rows, table.auto_width_sample
+        )
+        flexes = [col.flex for col in table.columns]
+        widths = _solve_column_widths(mins, maxs, flexes, width)
+        cached = table._auto_widths = (key, widths)
+    for col, colwidth in zip(table.columns, cached[1]):
+        col.width = colwidth
+
 
 class TableColumnData:
+    width = LayoutField()
+
     def __init__(
         self,
         *,
@@ -136,72 +337,359 @@ class TableColumnData:
 
 
 class MultiPageTable(MultiPageWidget):
+    """a table that continues on as many pages as its rows need.
+
+    the `heading` is repeated at the top of every page (unless
+    `repeat_heading` is off) and the `footer` closes every page, both are laid
+    out once and drawn as shared form xobjects. a page break never leaves
+    fewer than `orphans` rows at the bottom of a page or `widows` rows at the
+    top of the last one, and never falls after a row with `keep_with_next`.
+
+    with `subtotals` the rows are totalled up page by page while the table
+    paginates, see `reportex.aggregate.Subtotals`.
+
+    `rows` may be any iterable, it is consumed once and kept. for more rows
+    than should be held at once it may be a callable returning a new iterator
+    over the same rows each time: layout reads it once, keeping the height,
+    `keep_with_next` and totalled values of each row, and drawing reads it
+    again, a page of rows at a time. `rows` then stays empty.
+    """
+
     columns: list[TableColumnData]
     rows: list[TableRow]
     border: Border
+    _auto_widths = LayoutField()
+    _forms = LayoutField()
+    _prefix = LayoutField()
+    _pages = LayoutField()
+    _page_extras = LayoutField()
+    _running = LayoutField()
+    _row_constraints = LayoutField()
+    _clipped = LayoutField()
+    _row_count = LayoutField()
+    _keeps = LayoutField()
+    _row_values = LayoutField()
+    _cursor = LayoutField()
+    _heading_height = LayoutField()
+    _footer_height = LayoutField()
+    _total_height = LayoutField()
 
     def __init__(
         self,
         *,
         columns: list[TableColumnData],
-        rows: list[TableRow],
+        rows: Iterable[TableRow] | Callable[[], Iterable[TableRow]],
         heading: TableRow = None,
+        footer: TableRow = None,
+        subtotals: "Subtotals" = None,
+        repeat_heading: bool = True,
+        orphans: int = 1,
+        widows: int = 1,
         border: Border = Border.only(left=BorderSide(), top=BorderSide()),
+        batch_grid: bool = False,
+        auto_width: bool = False,
+        auto_width_sample: int | None = 1000,
     ):
         super().__init__(None, None)
 
         self.columns = columns
-        self.rows = [] if rows is None else rows
+        if rows is None:
+            rows = []
+        self._source = rows if callable(rows) else None
+        if self._source is not None:
+            self.rows = []
+        else:
+            self.rows = rows if isinstance(rows, list) else list(rows)
+        self.heading = heading
+        self.footer = footer
+        self.subtotals = subtotals
+        self.repeat_heading = repeat_heading
+        self.orphans = orphans
+        self.widows = widows
         self.border = border
-        if heading:
-            rows.insert(0, heading)
-        for row in rows:
+        self.batch_grid = batch_grid
+        self.auto_width = auto_width
+        self.auto_width_sample = auto_width_sample
+        self._auto_widths = None
+        self._forms = None
+        for row in (self.heading, self.footer, *self.rows):
+            if row is not None:
+                row.parent = self
+
+    @property
+    def _sized_rows(self) -> list[TableRow]:
+        fixed = [row for row in (self.heading, self.footer) if row is not None]
+        if self._source is not None:
+            # the columns fit the first rows of a source
+            return fixed + list(islice(self._each_row(), self.auto_width_sample))
+        return fixed + self.rows
+
+    @property
+    def _rows_key(self) -> list[tuple] | None:
+        if self._source is not None:
+            # a source gives the same rows every time, reading it isn't worth it
+            return None
+        return _rows_key(self._sized_rows)
+
+    def _each_row(self) -> Iterable[TableRow]:
+        if self._source is None:
+            yield from self.rows
+            return
+        for row in self._source():
             row.parent = self
+            yield row
 
     def layout(self, constraints: BoxConstraints) -> Size:
         self._set_column_widths(constraints.max_width)
 
-        remheight = DocInfo.page.height - self.page_offset.y
-        height = 0
-        y = 0
-        for row in self.rows:
-            try:
-                child_size = row.layout(
-                    BoxConstraints(0, 0, constraints.max_width, remheight)
-                )
-            except OverFlowError:
-                height += remheight
-                remheight = DocInfo.page.height
-                y = 0
-                child_size = row.layout(
-                    BoxConstraints(0, 0, constraints.max_width, remheight)
-                )
-
-            row.offset = Position(0, y)
-            remheight -= child_size.height
-            height += child_size.height
-            y += child_size.height
+        # a page holds as much as the constraints allow, `page_offset` of it
+        # is taken on the first one
+        page_height = constraints.max_height
+        row_constraints = BoxConstraints(0, 0, constraints.max_width, page_height)
+        self._row_constraints = row_constraints
+        self._heading_height = self._layout_fixed(self.heading, row_constraints)
+        self._footer_height = self._layout_fixed(self.footer, row_constraints)
+        self._total_height = 0
+        if self.subtotals is not None:
+            sample = self._total_row("", {})
+            self._total_height = sample.height
+
+        # a row taller than a continued page is cut to fit one
+        room = page_height - self._page_top(1, 1) - self._page_bottom()
+        clipped = BoxConstraints(0, 0, constraints.max_width, room)
+        self._clipped = clipped
+        # all pagination and the totals need of a row, read in one pass
+        heights = []
+        keeps = bytearray()
+        values = []
+        totals = self.subtotals.totals() if self.subtotals is not None else None
+        for row in self._each_row():
+            heights.append(row.layout_clipped(clipped).height)
+            keeps.append(row.keep_with_next)
+            if totals is not None:
+                values.append(totals.row_values(row))
+        self._row_count = len(heights)
+        self._keeps = keeps
+        self._row_values = values
+        # prefix[i] is the height of the rows before row i
+        self._prefix = list(accumulate(heights, initial=0))
+
+        first_avail = page_height - self.page_offset.y
+        self._forms = None
+        self._cursor = None
+        self._page_extras: list[tuple[list, list]] = []
+        self._pages = self._paginate(first_avail, page_height)
+        self._keeps = self._row_values = None
+
+        for page, (start, end) in enumerate(self._pages):
+            top = self._page_heading_height(page)
+            above, below = self._page_extras[page]
+            for row in above:
+                row.offset = Position(0, top)
+                top += row.height
+            if self._source is None:
+                self._place_rows(page, self.rows[start:end])
+            bottom = self._rows_top(page) + self._prefix[end]
+            for row in below:
+                row.offset = Position(0, bottom)
+                bottom += row.height
+
+        height = self.page_used(len(self._pages) - 1)
+        if len(self._pages) > 1:
+            height += first_avail + (len(self._pages) - 2) * page_height
 
         size = Size(constraints.max_width, height)
         self.set_size(size)
         return size
 
+    def _rows_top(self, page: int) -> float:
+        """where row 0 would be for the rows of `page` to be where they go"""
+        start, _ = self._pages[page]
+        above, _ = self._page_extras[page]
+        top = self._page_heading_height(page) + sum(row.height for row in above)
+        return top - self._prefix[start]
+
+    def _place_rows(self, page: int, rows: list[TableRow]):
+        start, _ = self._pages[page]
+        top = self._rows_top(page)
+        prefix = self._prefix
+        for ind, row in enumerate(rows, start):
+            row.offset = Position(0, top + prefix[ind])
+
+    def _page_rows(self, page: int) -> list[TableRow]:
+        """the laid out rows of `page`, read from the source again when the
+        table has one"""
+        start, end = self._pages[page]
+        if self._source is None:
+            return self.rows[start:end]
+        if self._cursor is None or self._cursor[1] > start:
+            self._cursor = (self._each_row(), 0)
+        rows_iter, at = self._cursor
+        rows = list(islice(rows_iter, start - at, end - at))
+        self._cursor = (rows_iter, end)
+        for row in rows:
+            row.layout_clipped(self._clipped)
+        self._place_rows(page, rows)
+        return rows
+
+    @staticmethod
+    def _layout_fixed(row: TableRow | None, constraints: BoxConstraints) -> float:
+        if row is None:
+            return 0
+        row.offset = Position(0, 0)
+        return row.layout(constraints).height
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pages)
+
+    def _page_heading_height(self, page: int) -> float:
+        if page == 0 or self.repeat_heading:
+            return self._heading_height
+        return 0
+
+    def _page_top(self, page: int, start: int) -> float:
+        top = self._page_heading_height(page)
+        if start and self.subtotals and self.subtotals.brought_forward is not None:
+            top += self._total_height
+        return top
+
+    def _page_bottom(self) -> float:
+        bottom = self._footer_height
+        if self.subtotals is not None:
+            bottom += self.subtotals.rows_at_page_end * self._total_height
+        return bottom
+
+    def page_used(self, page: int) -> float:
+        start, end = self._pages[page]
+        above, below = self._page_extras[page]
+        extras = sum(row.height for row in above) + sum(row.height for row in below)
+        return (
+            self._page_heading_height(page)
+            + extras
+            + self._prefix[end]
+            - self._prefix[start]
+            + self._footer_height
+        )
+
+    def _total_row(self, label: str, values: dict[int, str]) -> TableRow:
+        row = self.subtotals.make_row(label, values, len(self.columns))
+        row.parent = self
+        row.layout(self._row_constraints)
+        return row
+
+    def _close_page(self, start: int, end: int):
+        """fold the page's rows into the totals and build its total rows"""
+        subtotals = self.subtotals
+        count = self._row_count
+        if subtotals is None or start == end < count:
+            # nothing to total on a page the first row didn't fit on
+            self._page_extras.append(([], []))
+            return
+        if start == 0:
+            self._running = subtotals.totals()
+        running = self._running
+
+        above = []
+        if start and subtotals.brought_forward is not None:
+            above.append(self._total_row(subtotals.brought_forward, running.formatted()))
+
+        page_totals = subtotals.totals()
+        for values in self._row_values[start:end]:
+            page_totals.add_values(values)
+            running.add_values(values)
+
+        below = []
+        if subtotals.page_total is not None:
+            below.append(self._total_row(subtotals.page_total, page_totals.formatted()))
+        closing = (
+            subtotals.grand_total if end >= count else subtotals.carried_forward
+        )
+        if closing is not None:
+            below.append(self._total_row(closing, running.formatted()))
+        self._page_extras.append((above, below))
+
+    def _paginate(self, first_avail: float, page_height: float) -> list[tuple]:
+        """split the rows into [start, end) ranges, one per page, in a single
+        forward pass over the prefix sums"""
+        prefix = self._prefix
+        count = self._row_count
+        pages = []
+        start = 0
+        avail = first_avail
+        while True:
+            room = avail - self._page_top(len(pages), start) - self._page_bottom()
+            # last row whose bottom edge still fits on the page
+            end = bisect_right(prefix, prefix[start] + room + DISC, start) - 1
+            end = min(end, count)
+            brk = end if end >= count else self._break_before(start, end)
+            if brk == start and pages and start < count:
+                # the rules can't be kept on a full page, break where it's full,
+                # and a row as tall as a page gets a page of its own
+                brk = max(end, start + 1)
+            self._close_page(start, brk)
+            pages.append((start, brk))
+            if brk >= count:
+                return pages
+            start = brk
+            avail = page_height
+
+    def _break_before(self, start: int, end: int) -> int:
+        """pull a page break at `end` back until the keep rules hold"""
+        keeps = self._keeps
+        brk = end
+        while brk > start and keeps[brk - 1]:
+            brk -= 1
+        brk = min(brk, self._row_count - self.widows)
+        if brk - start < self.orphans:
+            # too few rows would stay behind, start them on the next page
+            return start
+        return brk
+
     def draw(self, canvas: Canvas, parent_pos: Position):
         pos = parent_pos.resolve(self.offset)
-        remheight = DocInfo.page.height - self.page_offset.y
-        for row in self.rows:
-            if row.height > remheight:
+        for page in range(self.page_count):
+            if page:
                 canvas.showPage()
-                new_ppos = self.parent.page_broken()
-                self.offset = Position(0, 0)
-                pos = new_ppos.resolve(self.offset)
-                remheight = DocInfo.page.height
+                pos = self.parent.page_broken()
+            self.draw_page(canvas, pos, page)
+
+    def draw_page(self, canvas: Canvas, pos: Position, page: int):
+        if self._forms is None:
+            # recorded once, every page draws the same form
+            self._forms = (
+                self._display_list(self.heading),
+                self._display_list(self.footer),
+            )
+        heading, footer = self._forms
+        if heading is not None and (page == 0 or self.repeat_heading):
+            heading.draw_form(canvas, pos.x, pos.y)
+        above, below = self._page_extras[page]
+        self._draw_rows(canvas, pos, above + self._page_rows(page) + below)
+        if footer is not None:
+            y = self.page_used(page) - self._footer_height
+            footer.draw_form(canvas, pos.x, pos.resolvey(y))
+
+    def _display_list(self, row: TableRow | None) -> DisplayList | None:
+        if row is None:
+            return None
+        recorder = RecordingCanvas()
+        self._draw_rows(recorder, Position(0, 0), [row])
+        return recorder.display_list(self.width, row.height)
+
+    def _draw_rows(self, canvas: Canvas, pos: Position, rows: list[TableRow]):
+        if self.batch_grid:
+            _draw_batched(canvas, pos, rows)
+            return
+        for row in rows:
             row.draw(canvas, pos)
-            remheight -= row.height
 
     def _set_column_widths(self, width):
         for col in self.columns:
             width -= col.margin
+        if self.auto_width:
+            _set_auto_column_widths(self, width)
+            return
         frac = width / self._flex
 
         for col in self.columns:
@@ -220,6 +708,8 @@ class Table(Widget):
     columns: list[TableColumnData]
     rows: list[TableRow]
     border: Border
+    allowed_rows = LayoutField()
+    _auto_widths = LayoutField()
 
     def __init__(
         self,
@@ -228,10 +718,17 @@ class Table(Widget):
         rows: list[TableRow] = None,
         heading: TableRow = None,
         border: Border = Border.only(left=BorderSide(), top=BorderSide()),
+        batch_grid: bool = False,
+        auto_width: bool = False,
+        auto_width_sample: int | None = 1000,
     ):
         super().__init__(None, None)
 
         self.border = border
+        self.batch_grid = batch_grid
+        self.auto_width = auto_width
+        self.auto_width_sample = auto_width_sample
+        self._auto_widths = None
         self.columns = columns
         self.rows = [] if rows is None else rows
         self.allowed_rows: list[TableRow] = []
@@ -240,11 +737,20 @@ class Table(Widget):
         for row in rows:
             row.parent = self
 
+    @property
+    def _sized_rows(self) -> list[TableRow]:
+        return self.rows
+
+    @property
+    def _rows_key(self) -> list[tuple]:
+        return _rows_key(self.rows)
+
     def layout(self, constraints: BoxConstraints) -> Size:
         size = Size(constraints.max_width, 0)
         self._set_column_widths(constraints.max_width)
         rem_height = constraints.max_height
         y = 0
+        allowed_rows = self.allowed_rows = []
         for row in self.rows:
             row_size = row.layout(
                 BoxConstraints(0, 0, constraints.max_width, rem_height)
@@ -252,7 +758,7 @@ class Table(Widget):
             if rem_height < row_size.height:
                 break
 
-            self.allowed_rows.append(row)
+            allowed_rows.append(row)
 
             row.offset = Position(0, y)
 
@@ -266,45 +772,65 @@ class Table(Widget):
 
     def draw(self, canvas: Canvas, parent_pos: Position):
         pos = parent_pos.resolve(self.offset)
+        if self.batch_grid:
+            _draw_batched(canvas, pos, self.allowed_rows, border_of=self)
+            return
         for row in self.allowed_rows:
             row.draw(canvas, pos)
         self._draw_self(canvas, pos)
 
+    def _add_border_to_grid(self, grid: GridBatch, pos: Position):
+        top, right, bottom, left = (
+            self.border.top,
+            self.border.right,
+            self.border.bottom,
+            self.border.left,
+        )
+        grid.add_line(top, pos.x, pos.y, pos.x + self.width, pos.y)
+        if right.width > 0:
+            x = pos.x + self.width - right.width / 2
+            grid.add_line(right, x, pos.y, x, pos.y - self.height)
+        if bottom.width > 0:
+            y = pos.y - self.height + bottom.width / 2
+            grid.add_line(bottom, pos.x, y, pos.x + self.width, y)
+        if left.width > 0:
+            x = pos.x + left.width / 2
+            grid.add_line(left, x, pos.y, x, pos.y - self.height)
+
     def _draw_self(self, canvas: Canvas, pos: Position):
         if self.border.top.width > 0:
             side = self.border.top
             canvas.setLineWidth(side.width)
-            color = side.color.normalize()
-            canvas.setStrokeColorRGB(color.r, color.g, color.b, color.a)
+            canvas.setStrokeColorRGB(*side.color.rgb, side.color.alpha)
             canvas.line(pos.x, pos.y, pos.x + self.width, pos.y)
 
         if self.border.right.width > 0:
             side = self.border.right
             canvas.setLineWidth(side.width)
-            color = side.color.normalize()
-            canvas.setStrokeColorRGB(color.r, color.g, color.b, color.a)
+            canvas.setStrokeColorRGB(*side.color.rgb, side.color.alpha)
             x = pos.x + self.width - side.width / 2
             canvas.line(x, pos.y, x, pos.y - self.height)
 
         if self.border.bottom.width > 0:
             side = self.border.bottom
             canvas.setLineWidth(side.width)
-            color = side.color.normalize()
-            canvas.setStrokeColorRGB(color.r, color.g, color.b, color.a)
+            canvas.setStrokeColorRGB(*side.color.rgb, side.color.alpha)
             y = pos.y - self.height + side.width / 2
             canvas.line(pos.x, y, pos.x + self.width, y)
 
         if self.border.left.width > 0:
             side = self.border.left
             canvas.setLineWidth(side.width)
-            color = side.color.normalize()
-            canvas.setStrokeColorRGB(color.r, color.g, color.b, color.a)
+            canvas.setStrokeColorRGB(*side.color.rgb, side.color.alpha)
             x = pos.x + side.width / 2
             canvas.line(x, pos.y, x, pos.y - self.height)
 
     def _set_column_widths(self, width):
         for col in self.columns:
             width -= col.margin
+        if self.auto_width:
+            _set_auto_column_widths(self, width)
+            return
         frac = width / self._flex
 
         for col in self.columns:
@@ -1,19 +1,257 @@
-import reportlab.pdfbase.pdfmetrics as metrics
-
-
-from reportex.core import Widget, Canvas, Position, BoxConstraints, Size
-
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import accumulate
+import math
 
-class CtxFont:
-    def __init__(self, name, size):
+import reportlab.pdfbase.pdfmetrics as metrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+
+from reportex.core import (
+    DISC,
+    BoxConstraints,
+    Canvas,
+    Color,
+    Colors,
+    FontsManager,
+    Interned,
+    LayoutField,
+    Position,
+    Size,
+    TextOverflow,
+    Widget,
+)
+
+# line break classes after UAX #14, simplified. no break before a closing
+# mark or after an opening one, a break after a hyphen, dash or solidus and
+# around ideographs
+_CLOSE = frozenset(
+    ")]}>,.:;!?%\u00bb\u2019\u201d"
+    "\u3001\u3002\u3009\u300b\u300d\u300f\u3011\u3015\u3017\u3019\u301b"
+    "\u3005\u30fc\u3041\u3043\u3045\u3047\u3049\u3063\u3083\u3085\u3087"
+    "\u30a1\u30a3\u30a5\u30a7\u30a9\u30c3\u30e3\u30e5\u30e7"
+    "\uff01\uff09\uff0c\uff0e\uff1a\uff1b\uff1f\uff3d\uff5d"
+)
+_OPEN = frozenset(
+    "([{<$\u00ab\u2018\u201c"
+    "\u3008\u300a\u300c\u300e\u3010\u3014\u3016\u3018\u301a"
+    "\uff08\uff3b\uff5b"
+)
+_HYPHENS = frozenset("-\u2010\u2013\u2014")
+_SOLIDUS = frozenset("/\\")
+_ZWSP = "\u200b"
+
+
+def _ideographic(char: str) -> bool:
+    code = ord(char)
+    return (
+        0x2E80 <= code <= 0x9FFF
+        or 0xAC00 <= code <= 0xD7A3
+        or 0xF900 <= code <= 0xFAFF
+        or 0xFF00 <= code <= 0xFFEF
+        or 0x20000 <= code <= 0x3FFFD
+    )
+
+
+def _break_positions(word: str) -> tuple[int, ...]:
+    """the indices in `word`, a string without spaces, where a line may
+    break"""
+    positions = []
+    for ind in range(1, len(word)):
+        before = word[ind - 1]
+        after = word[ind]
+        if before == _ZWSP:
+            positions.append(ind)
+        elif after in _CLOSE or before in _OPEN:
+            continue
+        elif before in _HYPHENS:
+            # "well-known" breaks, "-5", "--flag" and "a--b" don't
+            if ind > 1 and word[ind - 2].isalnum() and after.isalpha():
+                positions.append(ind)
+        elif before in _SOLIDUS:
+            if after not in _SOLIDUS:
+                positions.append(ind)
+        elif _ideographic(before) or _ideographic(after):
+            positions.append(ind)
+    return tuple(positions)
+
+
+ELLIPSIS = "\u2026"
+# how close a shrunk font size gets to the largest one that fits
+_SHRINK_PRECISION = 0.1
+
+
+@lru_cache(maxsize=4096)
+def _words(text: str) -> tuple[tuple[str, tuple[int, ...]], ...]:
+    """the whitespace separated words of `text` with where each may break,
+    found once per string"""
+    return tuple((word, _break_positions(word)) for word in text.split())
+
+
+_METRICS = frozenset(
+    ["ascent", "descent", "line_height", "space_width", "widths", "_ttf"]
+)
+
+
+class _WidthTable(dict):
+    """widths of single characters in 1/1000 em, looked up once each.
+
+    a ttf font registered with `FontsManager.register_ttfs` reads them from
+    the metrics it cached, another one from its parsed face.
+    """
+
+    def __init__(self, name: str):
+        super().__init__()
         self.name = name
-        self.size = size
+        self._codes: dict[int, float] | None = None
+        cached = FontsManager.metrics(name)
+        if cached is not None:
+            self._codes = {int(code): w for code, w in cached["widths"].items()}
+            self._default = cached["default_width"]
+            return
+        font = metrics.getFont(name)
+        if isinstance(font, TTFont):
+            self._codes = font.face.charWidths
+            self._default = font.face.defaultWidth
 
+    @property
+    def ttf(self) -> bool:
+        return self._codes is not None
+
+    def __missing__(self, char: str) -> float:
+        if self._codes is not None:
+            width = self._codes.get(ord(char), self._default)
+        else:
+            width = metrics.stringWidth(char, self.name, 1000)
+        self[char] = width
+        return width
+
+
+@lru_cache(maxsize=None)
+def _width_table(name: str) -> _WidthTable:
+    # widths in 1/1000 em are the same at every size
+    return _WidthTable(name)
+
+
+class CtxFont(Interned):
+    """a font at a size.
+
+    the vertical metrics, the width of a space and the table of character
+    widths are looked up the first time one of them is read, and from then
+    on are plain fields shared by every text using the font.
+    """
+
+    __slots__ = (
+        "name",
+        "size",
+        "ascent",
+        "descent",
+        "line_height",
+        "space_width",
+        "widths",
+        "_ttf",
+    )
+    _key_fields = ("name", "size")
+
+    def __new__(cls, name, size):
+        return cls._intern((name, size), name=name, size=size)
+
+    def __getattr__(self, attr):
+        # only reached while a metric is unset
+        if attr not in _METRICS:
+            raise AttributeError(attr)
+        self._resolve()
+        return object.__getattribute__(self, attr)
+
+    def _resolve(self):
+        ascent = metrics.getAscent(self.name, self.size)
+        descent = -metrics.getDescent(self.name, self.size)
+        widths = _width_table(self.name)
+        resolved = {
+            "ascent": ascent,
+            "descent": descent,
+            "line_height": ascent + descent,
+            "widths": widths,
+            "_ttf": widths.ttf,
+        }
+        for attr, value in resolved.items():
+            object.__setattr__(self, attr, value)
+        object.__setattr__(self, "space_width", self.string_width(" "))
+
+    def string_width(self, text: str) -> float:
+        """same as `pdfmetrics.stringWidth`, from the width table"""
+        units = sum(map(self.widths.__getitem__, text))
+        # multiplied in the order reportlab does, to get the same floats
+        if self._ttf:
+            return 0.001 * self.size * units
+        return units * 0.001 * self.size
+
+    def string_widths(self, texts: list[str]) -> list[float]:
+        """`string_width` of each of `texts`, in one pass over the table"""
+        lookup = self.widths.__getitem__
+        size = self.size
+        if self._ttf:
+            return [0.001 * size * sum(map(lookup, text)) for text in texts]
+        return [sum(map(lookup, text)) * 0.001 * size for text in texts]
+
+
+def _break_word(
+    word: str, breaks: tuple[int, ...], font: CtxFont, width: float
+) -> list[tuple]:
+    """break a word wider than a line into pieces that fit, at its break
+    opportunities where it can and between any two characters where a
+    segment alone is too wide. one pass over the character widths.
+
+    the pieces are (text, breaks, joined), `joined` for every piece but
+    the last, which has no space after it.
+    """
+    prefix = list(accumulate(map(font.widths.__getitem__, word), initial=0))
+    limit = width * 1000 / font.size
+    stops = (*breaks, len(word))
+    pieces = []
+    start = 0
+    while start < len(word):
+        end = bisect_right(prefix, prefix[start] + limit) - 1
+        if end < len(word):
+            stop = bisect_right(stops, end) - 1
+            if stop >= 0 and stops[stop] > start:
+                end = stops[stop]
+            # a character wider than the line still takes one
+            end = max(end, start + 1)
+        low = bisect_right(breaks, start)
+        high = bisect_left(breaks, end)
+        rebased = tuple(b - start for b in breaks[low:high])
+        pieces.append((word[start:end], rebased, end < len(word)))
+        start = end
+    return pieces
 
-class Text(Widget):
-    font: CtxFont = CtxFont("Helvetica", 10)
 
-    def __init__(self, text: str, font=None, word_space=1):
+class Text(Widget):
+    """a paragraph in one font, justified.
+
+    lines that don't fit the height are clipped, or with `overflow` the last
+    line that fits ends in an ellipsis, or the font shrinks, down to
+    `min_size`, to the largest size the whole text fits at.
+    """
+
+    # shrunk by layout with `TextOverflow.SHRINK_TO_FIT`
+    font: CtxFont = LayoutField(default=CtxFont("Helvetica", 10), built=True)
+    leading = LayoutField()
+    _line_width = LayoutField()
+    _lines = LayoutField()
+    _rem_space = LayoutField()
+    word_count = LayoutField()
+
+    def __init__(
+        self,
+        text: str,
+        font=None,
+        word_space=1,
+        overflow: TextOverflow = TextOverflow.CLIP,
+        min_size: float = 4,
+    ):
         super().__init__(None, None)
         self.text: str = text
 
@@ -28,86 +266,112 @@ class Text(Widget):
             self.font = font
         self.leading = self.line_height
         self.word_space = word_space
+        self.overflow = overflow
+        self.min_size = min_size
+        # the font asked for, `font` is the one in use once shrunk
+        self._base_font = self.font
 
     @property
     def line_height(self):
-        asc, dsc = self.get_ascent_decent()
-        return asc + dsc
+        return self.font.line_height
 
     def word_width(self, string):
-        return metrics.stringWidth(string, self.font.name, self.font.size)
+        return self.font.string_width(string)
 
     def get_ascent_decent(self):
-        ascent = metrics.getAscent(self.font.name, self.font.size)
-        descent = metrics.getDescent(self.font.name, self.font.size)
-        return ascent, -descent
+        return self.font.ascent, self.font.descent
 
     @property
     def space_width(self):
-        return metrics.stringWidth(" ", self.font.name, self.font.size)
-
-    def _wrap_word(self, word) -> list[str]:
-        # breakpoint()
-        width = self._line_width
-        words = []
-        nword = ""
-        for c in word:
-            new = nword + c
-            if self.word_width(new) > width:
-                words.append(nword)
-                nword = c
-            else:
-                nword = new
-        if nword:
-            words.append(nword)
-        return words
+        return self.font.space_width
+
+    def intrinsic_widths(self) -> tuple[float, float]:
+        words = _words(self.text)
+        if not words:
+            return 0, 0
+        widest = 0
+        for word, breaks in words:
+            starts = (0, *breaks)
+            ends = (*breaks, len(word))
+            for start, end in zip(starts, ends):
+                widest = max(widest, self.word_width(word[start:end]))
+        return widest, self.word_width(self.text)
+
+    def _fit(
+        self, word: str, breaks: tuple[int, ...], room: float, font: CtxFont
+    ) -> int:
+        """the end of the longest part of `word` up to a break opportunity
+        that fits in `room`, 0 if none does"""
+        string_width = font.string_width
+        fits = bisect_right(breaks, room, key=lambda end: string_width(word[:end]))
+        return breaks[fits - 1] if fits else 0
+
+    def _wrap(self, width):
+        self._lines, self._rem_space, self.word_count = self._wrapped(
+            self.font, width
+        )
 
-    def _wrap(self, width) -> list[str]:
-        # breakpoint()
+    def _wrapped(self, font: CtxFont, width: float) -> tuple[list, list, list]:
+        """the lines of the text wrapped in `width` at `font`, with the space
+        left on each line and their word counts"""
         lines = []
         words = []
-        for w in self.text.split():
-            if self.word_width(w) <= self._line_width:
-                words.append(w)
+        rem_space = []
+        word_count = []
+        string_width = font.string_width
+        space_width = font.space_width
+        for word, breaks in _words(self.text):
+            if string_width(word) <= width:
+                words.append((word, breaks, False))
             else:
-                words.extend(self._wrap_word(w))
+                words.extend(_break_word(word, breaks, font, width))
 
         space_left = width
         line = []
         wcount = 1
-        for ind, word in enumerate(words):
-            wwidth = self.word_width(word) + self.space_width
+        for word, breaks, joined in words:
+            space = "" if joined else " "
+            word_width = string_width(word)
+            wwidth = word_width + (0 if joined else space_width)
 
             if wwidth <= space_left:
-                line.append(word + " ")
-                space_left -= self.word_width(word) + self.space_width
+                line.append(word + space)
+                space_left -= wwidth
 
-            elif self.word_width(word) <= space_left:
+            elif word_width <= space_left:
                 line.append(word)
-                space_left -= self.word_width(word)
+                space_left -= word_width
 
             else:
+                # what fits of a word that can break stays on this line
+                head = 0
+                if line and breaks:
+                    head = self._fit(word, breaks, space_left, font)
+                if head:
+                    line.append(word[:head])
+                    space_left -= string_width(word[:head])
+                    wcount += 1
+                    word = word[head:]
+                    wwidth = string_width(word) + (0 if joined else space_width)
                 lines.append("".join(line))
-                self._rem_space.append(space_left)
-                self.word_count.append(wcount)
+                rem_space.append(space_left)
+                word_count.append(wcount)
                 wcount = 1
                 line = []
-                line.append(word + " ")
+                line.append(word + space)
                 space_left = width
-                space_left -= self.word_width(word) + self.space_width
+                space_left -= wwidth
             wcount += 1
 
         if line:
             lines.append("".join(line))
-            self._rem_space.append(space_left)
+            rem_space.append(space_left)
         if wcount > 1:
-            self.word_count.append(wcount)
-
-        self._lines = lines
+            word_count.append(wcount)
+        return lines, rem_space, word_count
 
     def _get_clipped(self, height) -> list[str]:
-        asc, dsc = self.get_ascent_decent()
-        line_height = asc + dsc
+        line_height = self.font.line_height
         result = []
         for line in self._lines:
             if height >= line_height:
@@ -123,16 +387,70 @@ class Text(Widget):
     def no_lines(self):
         return len(self._lines)
 
+    def _shrunk_font(self, constraints: BoxConstraints) -> CtxFont:
+        """the largest size of the font the text fits in `constraints` at,
+        `min_size` when none does.
+
+        the sizes tried are on a grid of the precision, so a table of shrunk
+        cells shares fonts, and each is checked by wrapping the text the way
+        layout will.
+        """
+        base = self._base_font
+
+        def size(step: int) -> float:
+            return round(step * _SHRINK_PRECISION, 1)
+
+        def fits(step: int) -> bool:
+            font = CtxFont(base.name, size(step))
+            lines, _, _ = self._wrapped(font, constraints.max_width)
+            return len(lines) * font.line_height <= constraints.max_height + DISC
+
+        if base.size <= self.min_size:
+            return base
+        lines, _, _ = self._wrapped(base, constraints.max_width)
+        if len(lines) * base.line_height <= constraints.max_height + DISC:
+            return base
+        # the largest step that fits lies in [low, high], low if none does
+        low = math.ceil(round(self.min_size / _SHRINK_PRECISION, 6))
+        high = math.ceil(round(base.size / _SHRINK_PRECISION, 6)) - 1
+        while low < high:
+            mid = (low + high + 1) // 2
+            if fits(mid):
+                low = mid
+            else:
+                high = mid - 1
+        return CtxFont(base.name, size(low))
+
+    def _ellipsize(self, lines: int, width: float):
+        """keep the first `lines` lines, the last ending in an ellipsis,
+        cut where it fits by bisecting over its prefix widths"""
+        font = self.font
+        del self._lines[lines:], self._rem_space[lines:], self.word_count[lines:]
+        if not lines:
+            return
+        line = self._lines[-1].rstrip()
+        prefix = list(accumulate(map(font.widths.__getitem__, line), initial=0))
+        room = (width - font.string_width(ELLIPSIS)) * 1000 / font.size
+        end = bisect_right(prefix, room) - 1
+        self._lines[-1] = line[: max(end, 0)].rstrip() + ELLIPSIS
+
     def layout(self, constraints: BoxConstraints):
         w = constraints.max_width
+        if self.overflow is TextOverflow.SHRINK_TO_FIT:
+            self.font = self._shrunk_font(constraints)
+            self.leading = self.line_height
         self._line_width = w
         self._wrap(self._line_width)
-        if self.word_width(self.text) < w:
-            w = self.word_width(self.text)
+        w = min(w, self.word_width(self.text))
+        line_height = self.line_height
+        max_height = constraints.max_height + DISC
+        if (
+            self.overflow is TextOverflow.ELLIPSIS
+            and self.no_lines * line_height > max_height
+        ):
+            self._ellipsize(int(max_height // line_height), w)
 
-        height = (
-            self.line_height if self.no_lines == 1 else self.no_lines * self.line_height
-        )
+        height = line_height if self.no_lines == 1 else self.no_lines * line_height
 
         h = height if height <= constraints.max_height else constraints.max_height
 
@@ -142,22 +460,31 @@ class Text(Widget):
 
     def draw(self, canvas: Canvas, parent_pos: Position):
         pos = parent_pos.resolve(self.offset)
+        self.draw_lines(canvas, pos, 0, len(self._get_clipped(self.height)))
+
+    def draw_lines(self, canvas: Canvas, pos: Position, start: int, end: int):
+        """draw the wrapped lines [start, end) from the top of `pos` down"""
         asc, _ = self.get_ascent_decent()
         obj = canvas.beginText(pos.x, pos.y - asc)
 
-        last_ind = len(self._lines) - 1
-        obj.setFont(self.font.name, self.font.size, leading=self.leading)
-        for ind, line in enumerate(self._get_clipped(self.height)):
+        lines = self._lines
+        word_count = self.word_count
+        rem_space = self._rem_space
+        font = self.font
+        last_ind = len(lines) - 1
+        obj.setFont(font.name, font.size, leading=self.leading)
+        for ind in range(start, end):
+            line = lines[ind]
             wspace = self.word_space
             line = line.rstrip()
 
             """distribute the remaining space of each line"""
 
             if ind != last_ind:
-                wc = self.word_count[ind]
+                wc = word_count[ind]
                 if wc > 2:
                     wc -= 2
-                rem = self._rem_space[ind]
+                rem = rem_space[ind]
                 frac = rem / wc
                 wspace = frac
                 obj.setWordSpace(wspace)
@@ -167,6 +494,193 @@ class Text(Widget):
         canvas.drawText(obj)
 
 
+@dataclass(frozen=True, slots=True)
+class Span:
+    """a run of `RichText`, `font` and `color` default to the widget's"""
+
+    text: str
+    font: CtxFont | None = None
+    color: Color | None = None
+
+
+_TOKENS = re.compile(r"\S+|\s+")
+
+
+@lru_cache(maxsize=1024)
+def _span_words(spans: tuple[Span, ...], font: CtxFont) -> tuple:
+    """the words of `spans` as ((span index, text, width), ...) with the space
+    after each as (span index, width) or None, measured once per paragraph"""
+    words = []
+    word = []
+    for ind, span in enumerate(spans):
+        tokens = _TOKENS.findall(span.text)
+        span_font = span.font or font
+        for token, width in zip(tokens, span_font.string_widths(tokens)):
+            if not token.isspace():
+                word.append((ind, token, width))
+            elif word:
+                words.append((tuple(word), (ind, span_font.space_width)))
+                word = []
+    if word:
+        words.append((tuple(word), None))
+    return tuple(words)
+
+
+class RichText(Widget):
+    """text of differently styled `spans` wrapping as one paragraph.
+
+    words break at whitespace, also across spans, and a word may be made of
+    several spans, like a bold word followed by a plain comma. each span is
+    measured with one lookup in its font's width table, and each line is
+    drawn as one text object that switches font and color as it goes.
+    """
+
+    font: CtxFont = CtxFont("Helvetica", 10)
+    _lines = LayoutField()
+    _line_metrics = LayoutField()
+
+    def __init__(
+        self,
+        spans: list[Span | str],
+        *,
+        font: CtxFont | None = None,
+        color: Color | None = None,
+    ):
+        super().__init__(None, None)
+        if font:
+            self.font = font
+        self.color = color
+        self.spans = [
+            Span(span) if isinstance(span, str) else span for span in spans
+        ]
+        # each line is [(span index, text)], with its width, ascent, descent
+        self._lines: list[list[tuple[int, str]]] = []
+        self._line_metrics: list[tuple[float, float, float]] = []
+
+    def _font(self, ind: int) -> CtxFont:
+        return self.spans[ind].font or self.font
+
+    @property
+    def _words(self) -> tuple:
+        return _span_words(tuple(self.spans), self.font)
+
+    def intrinsic_widths(self) -> tuple[float, float]:
+        words = self._words
+        min_width = max_width = 0
+        for word, space in words:
+            width = sum(piece[2] for piece in word)
+            min_width = max(min_width, width)
+            max_width += width + (space[1] if space else 0)
+        if words and words[-1][1]:
+            max_width -= words[-1][1][1]
+        return min_width, max_width
+
+    def _line_words(self, width: float) -> list[tuple]:
+        """the words to wrap in `width`. a word wider than that is split into
+        its pieces joined without a space, and a piece wider than that as
+        `Text` breaks a word"""
+        words = []
+        for word, after in self._words:
+            if sum(piece[2] for piece in word) <= width + DISC:
+                words.append((word, after))
+                continue
+            parts = []
+            for ind, text, text_width in word:
+                if text_width <= width + DISC:
+                    parts.append(((ind, text, text_width),))
+                    continue
+                font = self._font(ind)
+                broken = _break_word(text, _break_positions(text), font, width)
+                texts = [piece[0] for piece in broken]
+                widths = font.string_widths(texts)
+                parts.extend(((ind, t, w),) for t, w in zip(texts, widths))
+            words.extend((part, None) for part in parts[:-1])
+            words.append((parts[-1], after))
+        return words
+
+    def _wrap(self, width: float):
+        lines = []
+        line = []
+        used = 0
+        space = None
+        for word, after in self._line_words(width):
+            word_width = sum(piece[2] for piece in word)
+            gap = space[1] if line and space else 0
+            if line and used + gap + word_width > width + DISC:
+                lines.append((line, used))
+                line = []
+                used = gap = 0
+            if line and space:
+                line.append((space[0], " ", gap))
+            line.extend(word)
+            used += gap + word_width
+            space = after
+        if line:
+            lines.append((line, used))
+
+        self._lines = []
+        self._line_metrics = []
+        for pieces, used in lines:
+            # adjacent pieces of a span are drawn as one string
+            merged = []
+            for ind, text, _ in pieces:
+                if merged and merged[-1][0] == ind:
+                    merged[-1] = (ind, merged[-1][1] + text)
+                else:
+                    merged.append((ind, text))
+            fonts = [self._font(ind) for ind, _ in merged]
+            ascent = max(font.ascent for font in fonts)
+            descent = max(font.descent for font in fonts)
+            self._lines.append(merged)
+            self._line_metrics.append((used, ascent, descent))
+
+    @property
+    def no_lines(self):
+        return len(self._lines)
+
+    def layout(self, constraints: BoxConstraints) -> Size:
+        self._wrap(constraints.max_width)
+        width = max((used for used, _, _ in self._line_metrics), default=0)
+        height = sum(asc + dsc for _, asc, dsc in self._line_metrics)
+        if not self._lines:
+            height = self.font.line_height
+        size = Size(
+            min(width, constraints.max_width), min(height, constraints.max_height)
+        )
+        self.set_size(size)
+        return size
+
+    def draw(self, canvas: Canvas, parent_pos: Position):
+        pos = parent_pos.resolve(self.offset)
+        colored = self.color is not None or any(span.color for span in self.spans)
+        if colored:
+            canvas.saveState()
+        # once a span sets a color the others need one too
+        default = (self.color or Colors.black) if colored else None
+        top = pos.y
+        bottom = pos.y - self.height - DISC
+        for line, (_, ascent, descent) in zip(self._lines, self._line_metrics):
+            if top - ascent - descent < bottom:
+                break
+            obj = canvas.beginText(pos.x, top - ascent)
+            font = color = None
+            for ind, text in line:
+                span = self.spans[ind]
+                span_font = span.font or self.font
+                if span_font is not font:
+                    font = span_font
+                    obj.setFont(font.name, font.size)
+                span_color = span.color or default
+                if span_color is not None and span_color is not color:
+                    color = span_color
+                    obj.setFillColorRGB(*color.rgb, color.alpha)
+                obj.textOut(text)
+            canvas.drawText(obj)
+            top -= ascent + descent
+        if colored:
+            canvas.restoreState()
+
+
 if __name__ == "__main__":
     font = CtxFont("Helvetica", 1)
     Text("hello world")
@@ -1,3 +1,5 @@
+import weakref
+
 from reportlab.pdfgen.canvas import Canvas
 
 
@@ -16,9 +18,11 @@ from reportex.core import (
 )
 
 from reportex.container import Container
+from reportex.engine import Stepped
+from reportex.display_list import DisplayList, RecordingCanvas
 
 
-class Align(SingleChildWidget):
+class Align(Stepped, SingleChildWidget):
     def __init__(self, *, child: Widget, alignment: Alignment):
         super().__init__(child=child, width=None, height=None)
         self.alignment = alignment
@@ -35,56 +39,52 @@ class Align(SingleChildWidget):
     def client_origin(self):
         return super().client_origin
 
-    def layout(self, constraints: BoxConstraints):
-        child_size = self.child.layout(constraints)
+    def layout_steps(self, constraints: BoxConstraints):
+        child_size = yield self.child, constraints
         size = child_size
 
         self.child.offset = Position(0, 0)
         self.set_size(size)
         return size
 
-    def _set_offset(self):
+    def _aligned_offset(self) -> Position:
+        """where the alignment puts the widget in its parent, known once the
+        parent is laid out"""
         psize = Size(self.parent.client_width, self.parent.client_height)
         size = Size(self.width, self.height)
         origin = self.parent.client_origin
         match (self.alignment):
             case Alignment.LEFT:
-                self.offset = Position(origin.x, origin.y)
+                return Position(origin.x, origin.y)
             case Alignment.TOP_CENTER:
-                self.offset = Position(
-                    (psize.width - size.width) / 2 + origin.x, origin.y
-                )
+                return Position((psize.width - size.width) / 2 + origin.x, origin.y)
             case Alignment.RIGHT:
-                self.offset = Position(origin.x + psize.width - size.width, origin.y)
+                return Position(origin.x + psize.width - size.width, origin.y)
             case Alignment.LEFT_MIDDLE:
-                self.offset = Position(
-                    origin.x, origin.y + (psize.height - size.height) / 2
-                )
+                return Position(origin.x, origin.y + (psize.height - size.height) / 2)
             case Alignment.RIGHT_MIDDLE:
-                self.offset = Position(
+                return Position(
                     psize.width - size.width + origin.x,
                     (psize.height - size.height) / 2 + origin.y,
                 )
             case Alignment.BOTTOM_CENTER:
-                self.offset = Position(
+                return Position(
                     (psize.width - size.width) / 2 + origin.x,
                     (psize.height - size.height) + origin.y,
                 )
             case Alignment.CENTER:
-                self.offset = Position(
+                return Position(
                     x=(psize.width - size.width) / 2 + origin.x,
                     y=(psize.height - size.height) / 2 + origin.y,
                 )
 
-    def draw(self, canvas: Canvas, parent_pos: Position):
-        self._set_offset()
-
-        pos = parent_pos.resolve(self.offset)
+    def draw_steps(self, canvas: Canvas, parent_pos: Position):
+        pos = parent_pos.resolve(self._aligned_offset())
         if self.child is not None:
-            self.child.draw(canvas, pos)
+            yield self.child, pos
 
 
-class Padding(SingleChildWidget):
+class Padding(Stepped, SingleChildWidget):
     def __init__(self, *, child: Widget, padding: EdgeInset):
         super().__init__(child, None, None)
         self.padding = padding
@@ -101,20 +101,23 @@ class Padding(SingleChildWidget):
     def client_origin(self):
         return Position(self.padding.left, self.padding.right)
 
-    def layout(self, constraints: BoxConstraints) -> Size:
+    def intrinsic_widths(self) -> tuple[float, float]:
+        horizontal = self.padding.left + self.padding.right
+        cmin, cmax = self.child.intrinsic_widths()
+        return cmin + horizontal, cmax + horizontal
+
+    def layout_steps(self, constraints: BoxConstraints):
         child_max_width = constraints.max_width - (
             self.padding.left + self.padding.right
         )
         child_max_height = constraints.max_height - (
             self.padding.top + self.padding.bottom
         )
-        child_size = self.child.layout(
-            constraints=BoxConstraints(
-                min_width=0,
-                min_height=0,
-                max_width=child_max_width,
-                max_height=child_max_height,
-            )
+        child_size = yield self.child, BoxConstraints(
+            min_width=0,
+            min_height=0,
+            max_width=child_max_width,
+            max_height=child_max_height,
         )
 
         size = Size(constraints.max_width, constraints.max_height)
@@ -128,12 +131,12 @@ class Padding(SingleChildWidget):
         self.child.offset = Position(x=self.padding.left, y=self.padding.top)
         return size
 
-    def draw(self, canvas: Canvas, parent_pos: Position):
+    def draw_steps(self, canvas: Canvas, parent_pos: Position):
         pos = parent_pos.resolve(self.offset)
-        self.child.draw(canvas, pos)
+        yield self.child, pos
 
 
-class Expanded(SingleChildWidget):
+class Expanded(Stepped, SingleChildWidget):
     def __init__(self, *, child: Widget, flex: int = 1):
         super().__init__(child, None, None)
         self.flex = flex
@@ -150,10 +153,10 @@ class Expanded(SingleChildWidget):
     def client_origin(self):
         return super().client_origin
 
-    def layout(self, constraints: BoxConstraints) -> Size:
+    def layout_steps(self, constraints: BoxConstraints):
         w = constraints.max_width
         h = constraints.max_height
-        child_size = self.child.layout(constraints)
+        child_size = yield self.child, constraints
         if self.parent.__class__.__name__ == "Column":
             w = child_size.width
         else:
@@ -163,12 +166,12 @@ class Expanded(SingleChildWidget):
         self.set_size(size)
         return size
 
-    def draw(self, canvas: Canvas, parent_pos: Position):
+    def draw_steps(self, canvas: Canvas, parent_pos: Position):
         pos = parent_pos.resolve(self.offset)
-        self.child.draw(canvas, pos)
+        yield self.child, pos
 
 
-class Center(SingleChildWidget):
+class Center(Stepped, SingleChildWidget):
     def __init__(self, child: Widget):
         super().__init__(child, None, None)
 
@@ -184,17 +187,17 @@ class Center(SingleChildWidget):
     def client_origin(self):
         return super().client_origin
 
-    def layout(self, constraints: BoxConstraints) -> Size:
-        child_size = self.child.layout(constraints)
+    def layout_steps(self, constraints: BoxConstraints):
+        child_size = yield self.child, constraints
         x = (constraints.max_width - child_size.width) / 2
         y = (constraints.max_height - child_size.height) / 2
         self.child.offset = Position(x, y)
         self.set_size(child_size)
         return child_size
 
-    def draw(self, canvas: Canvas, parent_pos: Position):
+    def draw_steps(self, canvas: Canvas, parent_pos: Position):
         pos = parent_pos.resolve(self.offset)
-        self.child.draw(canvas, pos)
+        yield self.child, pos
 
 
 class Divider(Widget):
@@ -222,8 +225,7 @@ class Divider(Widget):
 
     def draw(self, canvas: Canvas, parent_pos: Position):
         canvas.saveState()
-        c = self.color.normalize()
-        canvas.setStrokeColorRGB(c.r, c.g, c.b, c.a)
+        canvas.setStrokeColorRGB(*self.color.rgb, self.color.alpha)
         canvas.setLineWidth(self.linewidth)
 
         if self.axis == Axis.HORIZONTAL:
@@ -251,5 +253,67 @@ class Divider(Widget):
             )
 
 
+class Reusable(SingleChildWidget):
+    """draws its child once per `key` and reuses the recorded drawing.
+
+    every widget with the same key and size drawn on one canvas must look the
+    same, e.g. repeated headers, footers or badges, a child that depends on
+    the page it's on (`PageNumber`, `Anchor`) raises `RecordingError`. with
+    `as_form` the drawing becomes a pdf form xobject, so each further use
+    costs a single reference in the page stream.
+    """
+
+    # canvas -> {(key, width, height): display list}, the drawings of a
+    # document go with its canvas
+    _display_lists: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def __init__(self, *, child: Widget, key, as_form: bool = True):
+        super().__init__(child, None, None)
+        self.key = key
+        self.as_form = as_form
+
+    @property
+    def client_width(self):
+        return self.width
+
+    @property
+    def client_height(self):
+        return self.height
+
+    @property
+    def client_origin(self):
+        return super().client_origin
+
+    def layout(self, constraints: BoxConstraints) -> Size:
+        child_size = self.child.layout(constraints)
+        self.child.offset = Position(0, 0)
+        self.set_size(child_size)
+        return child_size
+
+    def draw(self, canvas: Canvas, parent_pos: Position):
+        pos = parent_pos.resolve(self.offset)
+        if isinstance(canvas, RecordingCanvas):
+            # already part of a recording, nesting forms buys nothing
+            self.child.draw(canvas, pos)
+            return
+
+        display_list = self._display_list(canvas)
+        if self.as_form:
+            display_list.draw_form(canvas, pos.x, pos.y)
+        else:
+            display_list.replay(canvas, pos.x, pos.y)
+
+    def _display_list(self, canvas: Canvas) -> DisplayList:
+        drawn = self._display_lists.setdefault(canvas, {})
+        key = (self.key, self.width, self.height)
+        display_list = drawn.get(key)
+        if display_list is None:
+            recorder = RecordingCanvas()
+            self.child.draw(recorder, Position(0, 0))
+            display_list = recorder.display_list(self.width, self.height)
+            drawn[key] = display_list
+        return display_list
+
+
 def SizedBox(*, width=None, height=None, child: Widget = None) -> Widget:
     return Container(width=width, height=height, child=child)